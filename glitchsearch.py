@@ -0,0 +1,341 @@
+'''
+glitchsearch.py
+Joint parameter search over PLL delay, reset delay, reset pulse width and statemachine clock.
+
+Everything else in here only ever varies the reset delay, but the comments all over the
+place say the other three matter too ("don't go past 408000", "10 MHz mode plays nicer
+with a short pulse width", etc.) so this searches all four at once.
+
+Points are picked with UCB1 on their hit rates, and get dropped two ways:
+- A point is dropped once it's had enough attempts that even its best likely hit rate
+  (Wilson upper bound) is under min_hit_rate. Only the point itself goes, never its
+  neighbours. 0xF2/0xFB is what any reset pulse that didn't do anything ends up at, so
+  a hash check failure doesn't say which way to move the reset delay, and neither
+  late nor early outcomes prune anything on their own. They're only counted.
+- A region (all the reset delays for one PLL delay/pulse width/clock combo) is dropped
+  once its best possible hit rate is worse than the worst likely hit rate of the best region.
+
+No hardware imports in here, so it can be tested/replayed on a PC.
+'''
+
+from math import log, sqrt
+
+REFERENCE_FREQ = 48000000
+'''
+PLL and reset delays are given in cycles at this frequency (same as rgh12.py)
+and scaled to whatever statemachine clock a point runs at.
+'''
+
+# attempt outcomes
+OUTCOME_OK    = 0
+OUTCOME_LATE  = 1   # hash check failed (reset too late, or didn't do anything)
+OUTCOME_EARLY = 2   # CPU rebooted/crashed before the hash check, reset happened too early
+OUTCOME_OTHER = 3   # didn't tell us which way to go (SMC timeout, post-glitch crash, etc.)
+
+def wilson_interval(hits: int, attempts: int, z: float = 1.96) -> tuple:
+    '''
+    Wilson score interval for a hit rate.
+
+    Returns `(low, high)`. With no attempts the interval is `(0.0, 1.0)`.
+    '''
+    if attempts == 0:
+        return (0.0, 1.0)
+    p = hits / attempts
+    z2 = z * z
+    denom = 1 + z2 / attempts
+    centre = (p + z2 / (2 * attempts)) / denom
+    spread = (z / denom) * sqrt(p * (1 - p) / attempts + z2 / (4 * attempts * attempts))
+    return (max(0.0, centre - spread), min(1.0, centre + spread))
+
+def scale_cycles(cycles: int, sm_freq: int, reference_freq: int = REFERENCE_FREQ) -> int:
+    '''
+    Converts a cycle count at reference_freq to the nearest cycle count at sm_freq.
+    '''
+    return (cycles * sm_freq + (reference_freq >> 1)) // reference_freq
+
+class SearchPoint:
+    '''
+    One point in the search space. Delays are in cycles at this point's statemachine clock.
+    '''
+    __slots__ = ('region', 'index', 'pll_delay', 'reset_delay', 'pulse_width', 'sm_freq',
+                 'attempts', 'hits', 'late', 'early', 'alive')
+
+    def __init__(self, region, index, pll_delay, reset_delay, pulse_width, sm_freq):
+        self.region      = region
+        self.index       = index        # position in the region's reset delay list
+        self.pll_delay   = pll_delay
+        self.reset_delay = reset_delay
+        self.pulse_width = pulse_width
+        self.sm_freq     = sm_freq
+        self.attempts    = 0
+        self.hits        = 0
+        self.late        = 0
+        self.early       = 0
+        self.alive       = True
+
+    def __repr__(self):
+        return f"pll {self.pll_delay} reset {self.reset_delay} pulse {self.pulse_width} " \
+               f"@ {self.sm_freq // 1000000} MHz: {self.hits}/{self.attempts}"
+
+class SearchRegion:
+    '''
+    Every reset delay for one (PLL delay, pulse width, statemachine clock) combination.
+    '''
+    __slots__ = ('points', 'attempts', 'hits', 'alive')
+
+    def __init__(self):
+        self.points   = []
+        self.attempts = 0
+        self.hits     = 0
+        self.alive    = True
+
+class GlitchSearch:
+    '''
+    Search engine. Call `next_point()`, run a glitch attempt with it, then `record()` the outcome.
+    '''
+
+    def __init__(self,
+                 pll_delays: list,
+                 reset_delays: list,
+                 pulse_widths: list,
+                 sm_freqs: list,
+                 exploration: float = 1.0,
+                 min_region_attempts: int = 30,
+                 min_point_attempts: int = 20,
+                 min_hit_rate: float = 0.1):
+        '''
+        Parameters:
+        - pll_delays: PLL delays to try, in cycles at REFERENCE_FREQ.
+        - reset_delays: Reset delays to try, in cycles at REFERENCE_FREQ.
+        - pulse_widths: Reset pulse widths to try, in statemachine cycles (/CPU_RESET low time).
+        - sm_freqs: Statemachine clocks to try, in Hz.
+        - exploration: UCB1 exploration constant. Higher tries more points before settling down.
+        - min_region_attempts: Regions aren't dropped until they've had this many attempts.
+        - min_point_attempts: Points aren't dropped until they've had this many attempts.
+        - min_hit_rate: A point is dropped once the upper end of its Wilson interval is under this.
+                        With the defaults, a point with no hits goes after 35 attempts.
+        '''
+        self.exploration         = exploration
+        self.min_region_attempts = min_region_attempts
+        self.min_point_attempts  = min_point_attempts
+        self.min_hit_rate        = min_hit_rate
+
+        self.regions = []
+        self.points  = []
+        self.total   = 0
+
+        for sm_freq in sm_freqs:
+            for pulse_width in pulse_widths:
+                for pll_delay in pll_delays:
+                    region = SearchRegion()
+                    pll_cycles = scale_cycles(pll_delay, sm_freq)
+                    for i, reset_delay in enumerate(sorted(reset_delays)):
+                        point = SearchPoint(region, i, pll_cycles, scale_cycles(reset_delay, sm_freq),
+                                            pulse_width, sm_freq)
+                        region.points.append(point)
+                        self.points.append(point)
+                    self.regions.append(region)
+
+        if len(self.points) == 0:
+            raise RuntimeError("search space is empty")
+
+    def next_point(self) -> SearchPoint:
+        '''
+        Picks the next point to try.
+        '''
+        best = None
+        best_score = -1.0
+        log_total = log(self.total + 1)
+        for point in self.points:
+            if not point.alive or not point.region.alive:
+                continue
+            if point.attempts == 0:
+                return point
+            mean = point.hits / point.attempts
+            score = mean + self.exploration * sqrt(log_total / point.attempts)
+            if score > best_score:
+                best = point
+                best_score = score
+
+        if best is None:
+            raise RuntimeError("every point in the search space has been pruned")
+        return best
+
+    def record(self, point: SearchPoint, outcome: int):
+        '''
+        Feeds the outcome of an attempt at `point` back into the search.
+        '''
+        region = point.region
+        point.attempts += 1
+        region.attempts += 1
+        self.total += 1
+
+        if outcome == OUTCOME_OK:
+            point.hits += 1
+            region.hits += 1
+        else:
+            if outcome == OUTCOME_LATE:
+                point.late += 1
+            elif outcome == OUTCOME_EARLY:
+                point.early += 1
+            self._prune_point(point)
+
+        self._prune_regions()
+
+    def _prune_point(self, point: SearchPoint):
+        '''
+        Drops `point` if it's had enough attempts to say its hit rate is under min_hit_rate.
+        '''
+        if point.attempts < self.min_point_attempts or \
+           wilson_interval(point.hits, point.attempts)[1] >= self.min_hit_rate:
+            return
+        point.alive = False
+
+        region = point.region
+        if not any(p.alive for p in region.points):
+            region.alive = False
+
+    def _prune_regions(self):
+        '''
+        Early-stops regions that can't plausibly beat the best one.
+        '''
+        best_low = 0.0
+        for region in self.regions:
+            if region.alive and region.attempts >= self.min_region_attempts:
+                best_low = max(best_low, wilson_interval(region.hits, region.attempts)[0])
+
+        if best_low == 0.0:
+            return
+
+        for region in self.regions:
+            if region.alive and region.attempts >= self.min_region_attempts and \
+               wilson_interval(region.hits, region.attempts)[1] < best_low:
+                region.alive = False
+
+    def best(self) -> SearchPoint:
+        '''
+        Returns the point with the best hit rate so far (lower Wilson bound, so lucky one-offs don't win).
+        '''
+        best = None
+        best_low = -1.0
+        for point in self.points:
+            if point.attempts == 0:
+                continue
+            low = wilson_interval(point.hits, point.attempts)[0]
+            if low > best_low:
+                best = point
+                best_low = low
+        return best
+
+    def report(self, count: int = 10):
+        '''
+        Prints the top `count` points and how many regions are still alive.
+        '''
+        ranked = [ p for p in self.points if p.attempts != 0 ]
+        ranked.sort(key=lambda p: wilson_interval(p.hits, p.attempts)[0], reverse=True)
+        alive = sum(1 for r in self.regions if r.alive)
+        print(f"{self.total} attempts, {alive}/{len(self.regions)} regions alive")
+        for point in ranked[:count]:
+            print(f"- {point}")
+
+def normal_quantile(p: float) -> float:
+    '''
+    z such that a standard normal variable is above z with probability p (0 < p < 0.5).
+    Abramowitz & Stegun 26.2.23, good to about 4.5e-4.
+    '''
+    t = sqrt(-2.0 * log(p))
+    return t - (2.515517 + 0.802853 * t + 0.010328 * t * t) / \
+               (1.0 + 1.432788 * t + 0.189269 * t * t + 0.001308 * t * t * t)
+
+class Comparison:
+    '''
+    A/B(/C/...) comparison of a handful of configurations, e.g. reset delays 349818 vs 349819.
+
+    Attempts are interleaved round robin so drift (temperature, whatever) hits every
+    configuration equally. Every so often each configuration's Wilson interval is
+    recomputed, and the comparison stops as soon as the difference between one configuration
+    and every other one is significantly above zero (Newcombe's method, built from the Wilson intervals).
+
+    Checking over and over is a sequential test, so the error rate has to be spent across the
+    checks: check k gets alpha / (k * (k + 1)) (which adds up to alpha), split between the
+    configurations. Checks happen every time the round count has grown by a quarter, so there
+    aren't many of them and the intervals don't have to be that much wider than usual.
+    The chance of ever calling the wrong winner stays under alpha no matter how long it runs.
+    '''
+
+    def __init__(self, configs: list, alpha: float = 0.05, min_rounds: int = 10):
+        '''
+        Parameters:
+        - configs: Configurations to compare. Can be anything; they're handed back by next_config().
+        - alpha: Chance of calling a winner that isn't better. Default is 0.05.
+        - min_rounds: Round to run the first check at. Default is 10.
+        '''
+        if len(configs) < 2:
+            raise RuntimeError("need at least two configurations to compare")
+
+        self.configs    = list(configs)
+        self.alpha      = alpha
+        self.min_rounds = min_rounds
+        self.attempts   = [ 0 ] * len(configs)
+        self.hits       = [ 0 ] * len(configs)
+        self.rounds     = 0
+        self.checks     = 0
+        self._next_check = min_rounds
+        self._next      = 0
+        self._winner    = -1
+
+    def next_config(self) -> tuple:
+        '''
+        Returns `(index, config)` for the next attempt.
+        '''
+        return (self._next, self.configs[self._next])
+
+    def record(self, index: int, success: bool):
+        '''
+        Records the outcome of an attempt with configuration `index`.
+        '''
+        self.attempts[index] += 1
+        if success:
+            self.hits[index] += 1
+
+        self._next = (index + 1) % len(self.configs)
+        if self._next == 0:
+            self.rounds += 1
+            if self.rounds >= self._next_check:
+                self._next_check = self.rounds + max(1, self.rounds >> 2)
+                self._check()
+
+    def _z(self) -> float:
+        k = max(1, self.checks)
+        return normal_quantile(self.alpha / (k * (k + 1)) / len(self.configs))
+
+    def _check(self):
+        self.checks += 1
+        z = self._z()
+        rates = [ h / a for h, a in zip(self.hits, self.attempts) ]
+        intervals = [ wilson_interval(h, a, z) for h, a in zip(self.hits, self.attempts) ]
+        for i in range(len(self.configs)):
+            if all(self._diff_low(rates, intervals, i, j) > 0 for j in range(len(self.configs)) if j != i):
+                self._winner = i
+                return
+
+    @staticmethod
+    def _diff_low(rates: list, intervals: list, i: int, j: int) -> float:
+        '''
+        Lower bound on rate i - rate j, from the two Wilson intervals (Newcombe's hybrid score method).
+        '''
+        return rates[i] - rates[j] - sqrt((rates[i] - intervals[i][0]) ** 2 + (intervals[j][1] - rates[j]) ** 2)
+
+    def winner(self) -> int:
+        '''
+        Index of the configuration that's significantly better than the rest, or -1 if there isn't one yet.
+        '''
+        return self._winner
+
+    def report(self):
+        z = self._z()
+        print(f"{self.rounds} rounds, {self.checks} checks, z = {z:.2f}")
+        for i, config in enumerate(self.configs):
+            low, high = wilson_interval(self.hits[i], self.attempts[i], z)
+            mark = " <- winner" if i == self._winner else ""
+            print(f"- {config}: {self.hits[i]}/{self.attempts[i]} ({low:.3f}-{high:.3f}){mark}")
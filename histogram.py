@@ -0,0 +1,198 @@
+'''
+histogram.py
+Fixed-bin histograms of POST transition timings, kept on the device.
+
+The scripts print "DA -> F2 = N usec" and friends every attempt, and unless someone scrapes
+the terminal that's gone. These keep every measurement instead, in bins that are allocated
+up front, so adding one is an index and an increment no matter how long the run goes.
+Bins are `array("I")`, so a few hundred bins per interval is a few KB all up.
+
+Histograms get saved to flash as JSON and picked back up next session, and export_csv()
+dumps all of them in one go for a spreadsheet.
+
+No hardware imports in here, so it can be tested on a PC.
+'''
+
+import json
+from array import array
+
+# interval name -> (lowest usec, bin width in usec, number of bins)
+DEFAULT_INTERVALS = {
+    "d6_d9":    (0,     50,    128),    # 0xD6 -> 0xD9
+    "d9_da":    (0,     50,    128),    # 0xD9 -> 0xDA, where the slowdown is
+    "da_f2":    (7000,  2,     256),    # 0xDA -> 0xF2, the hash check the reset delay is aimed at
+    "54_dwell": (0,     1000,  128),    # how long CB_X sat on 0x54
+    "1d_96":    (0,     20000, 128),    # 0x1D -> 0x96, the bootrom RSA check (CAboom)
+}
+
+class Histogram:
+    '''
+    Counts of measurements in `bins` bins of `width` usec from `lo` up, plus one bin each
+    for anything under or over that range. Exact min and max are kept alongside.
+    '''
+
+    def __init__(self, lo: int, width: int, bins: int):
+        '''
+        Parameters:
+        - lo: Lowest value that goes in the first bin, in usec.
+        - width: Bin width in usec.
+        - bins: Number of bins, not counting under/over.
+        '''
+        if width < 1 or bins < 1:
+            raise RuntimeError("histogram needs at least one bin of at least 1 usec")
+        self.lo     = lo
+        self.width  = width
+        self.bins   = bins
+        self.counts = array("I", [ 0 ] * (bins + 2))   # under, bins..., over
+        self.stats  = array("i", [ 0, 0, 0 ])          # count, min, max
+
+    def add(self, usec: int):
+        i = (usec - self.lo) // self.width
+        if i < 0:
+            i = -1
+        elif i > self.bins:
+            i = self.bins
+        self.counts[i + 1] += 1
+
+        stats = self.stats
+        if stats[0] == 0 or usec < stats[1]:
+            stats[1] = usec
+        if stats[0] == 0 or usec > stats[2]:
+            stats[2] = usec
+        stats[0] += 1
+
+    @property
+    def count(self) -> int:
+        return self.stats[0]
+
+    def mean(self) -> float:
+        '''
+        Mean off the bin midpoints (under/over count as min/max), so it's only good to half a bin.
+        '''
+        if self.stats[0] == 0:
+            return 0.0
+        total = self.counts[0] * self.stats[1] + self.counts[self.bins + 1] * self.stats[2]
+        for i in range(self.bins):
+            if self.counts[i + 1] != 0:
+                total += self.counts[i + 1] * (self.lo + i * self.width + self.width / 2)
+        return total / self.stats[0]
+
+    def percentile(self, p: float) -> int:
+        '''
+        Lower edge of the bin the p-th percentile (0-100) lands in. -1 if it's empty.
+        '''
+        if self.stats[0] == 0:
+            return -1
+        target = self.stats[0] * p / 100
+        seen = self.counts[0]
+        if seen > target:
+            return self.stats[1]
+        for i in range(self.bins):
+            seen += self.counts[i + 1]
+            if seen > target:
+                return self.lo + i * self.width
+        return self.stats[2]
+
+    def same_shape(self, lo: int, width: int, bins: int) -> bool:
+        return self.lo == lo and self.width == width and self.bins == bins
+
+    def to_dict(self) -> dict:
+        return { "lo": self.lo, "width": self.width, "counts": list(self.counts), "stats": list(self.stats) }
+
+    @staticmethod
+    def from_dict(d: dict):
+        histogram = Histogram(d["lo"], d["width"], len(d["counts"]) - 2)
+        histogram.counts = array("I", d["counts"])
+        histogram.stats  = array("i", d["stats"])
+        return histogram
+
+class HistogramSet:
+    '''
+    One Histogram per measured interval, saved to and loaded from one file.
+    '''
+
+    def __init__(self, path: str = "histograms.json", intervals: dict = None, save_every: int = 50):
+        '''
+        Parameters:
+        - path: Where the histograms live on flash. Default is "histograms.json".
+        - intervals: `{ name: (lo, width, bins) }`. Default is None (DEFAULT_INTERVALS).
+        - save_every: attempt_done() saves after this many attempts, to go easy on the flash.
+                      0 means only save() saves. Default is 50.
+        '''
+        if intervals is None:
+            intervals = DEFAULT_INTERVALS
+        self.path       = path
+        self.save_every = save_every
+        self.unsaved    = 0
+        self.histograms = { name: Histogram(*shape) for name, shape in intervals.items() }
+
+    def add(self, name: str, usec: int):
+        '''
+        Adds a measurement. Intervals that weren't set up are ignored.
+        '''
+        histogram = self.histograms.get(name)
+        if histogram is not None:
+            histogram.add(usec)
+
+    def attempt_done(self):
+        self.unsaved += 1
+        if self.save_every != 0 and self.unsaved >= self.save_every:
+            self.save()
+
+    def load(self) -> bool:
+        '''
+        Picks up where the last session left off. Saved histograms with a different
+        bin layout than what's set up now are thrown away rather than mixed in.
+
+        Returns True if there was anything to load.
+        '''
+        try:
+            with open(self.path) as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return False
+
+        for name, d in saved.items():
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                continue
+            loaded = Histogram.from_dict(d)
+            if histogram.same_shape(loaded.lo, loaded.width, loaded.bins):
+                self.histograms[name] = loaded
+            else:
+                print(f"histogram {name} changed shape, starting it over")
+        return True
+
+    def save(self):
+        with open(self.path, "w") as f:
+            json.dump({ name: histogram.to_dict() for name, histogram in self.histograms.items() }, f)
+        self.unsaved = 0
+
+    def clear(self):
+        for name, histogram in self.histograms.items():
+            self.histograms[name] = Histogram(histogram.lo, histogram.width, histogram.bins)
+
+    def export_csv(self, path: str = "histograms.csv"):
+        '''
+        Writes every non-empty bin of every histogram as `interval,bin_lo_usec,bin_hi_usec,count`.
+        Under/over bins go from/to the recorded min/max.
+        '''
+        with open(path, "w") as f:
+            f.write("interval,bin_lo_usec,bin_hi_usec,count\n")
+            for name, h in self.histograms.items():
+                if h.counts[0] != 0:
+                    f.write(f"{name},{h.stats[1]},{h.lo},{h.counts[0]}\n")
+                for i in range(h.bins):
+                    if h.counts[i + 1] != 0:
+                        lo = h.lo + i * h.width
+                        f.write(f"{name},{lo},{lo + h.width},{h.counts[i + 1]}\n")
+                if h.counts[h.bins + 1] != 0:
+                    f.write(f"{name},{h.lo + h.bins * h.width},{h.stats[2] + 1},{h.counts[h.bins + 1]}\n")
+
+    def report(self):
+        for name, h in self.histograms.items():
+            if h.count == 0:
+                continue
+            print(f"{name}: {h.count} samples, mean ~{h.mean():.0f} usec, "
+                  f"min {h.stats[1]} / p50 {h.percentile(50)} / p99 {h.percentile(99)} / max {h.stats[2]} usec, "
+                  f"{h.counts[0]} under, {h.counts[h.bins + 1]} over")
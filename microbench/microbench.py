@@ -0,0 +1,278 @@
+'''
+Microbenchmarks for the MicroPython stuff the glitch loops lean on
+Runs on Raspberry Pi Pico / RP2040
+
+Everything in the hot paths gets timed here: mem32 reads off the GPIO block, ticks_us(),
+Pin.value(), StateMachine get()/put()/active(), SoftI2C writes and print(). Where it makes
+sense each one is timed as plain bytecode, @micropython.native and @micropython.viper, at
+every clock in CLOCKS, so the "micropython's interpreter is slow enough for this to actually
+reset the CPU" style guesses can be replaced with real numbers.
+
+Results are printed as a table and saved to RESULTS_FILE as
+`{ "clock in Hz": { "benchmark name": ns per call } }`. A POST edge can be noticed late by up to
+one trip around the wait loop, so the POST poll numbers are what goes into the jitter budget.
+Copy the file next to pigli360.py and its QuietWindow picks them up (see load_microbench()).
+Anything that costs more than the window it has to fit in needs to be in PIO.
+
+Don't run this with the console powered: the I2C benchmark writes to the clock chip's
+address (0x69) on pins 8/9, like manclk.py does, and it's not meant to be poked mid-boot.
+'''
+from time import ticks_us, ticks_diff
+from machine import Pin,mem32,freq,SoftI2C
+import micropython
+import rp2
+import json
+
+RP2040_GPIO_IN = 0xD0000004
+
+# 125 MHz is the stock clock, 192 MHz is what the glitch code runs at.
+# anything above 200 MHz is overclocking; if it won't run stable, take it out
+CLOCKS = (125000000, 192000000, 240000000)
+
+ITERATIONS   = 10000
+SLOW_ITERATIONS = 200   # print() and I2C, which take forever
+
+RESULTS_FILE = "microbench.json"
+
+POST_PIN = Pin(15, Pin.IN, Pin.PULL_UP)     # POST bit 0 on the pico board
+LED      = Pin(25, Pin.OUT)                 # writes go here, NOT to anything on the console
+
+# ------------------------------------------------------------------------
+#
+# Loops. Every benchmark is a loop that runs the thing n times.
+# The matching empty loop gets subtracted so only the thing itself is counted.
+#
+# ------------------------------------------------------------------------
+
+def empty_bytecode(n):
+    for _ in range(n):
+        pass
+
+@micropython.native
+def empty_native(n):
+    for _ in range(n):
+        pass
+
+@micropython.viper
+def empty_viper(n: int):
+    i = 0
+    while i < n:
+        i += 1
+
+def mem32_bytecode(n):
+    for _ in range(n):
+        mem32[RP2040_GPIO_IN]
+
+@micropython.native
+def mem32_native(n):
+    for _ in range(n):
+        mem32[RP2040_GPIO_IN]
+
+@micropython.viper
+def mem32_viper(n: int):
+    gpio = ptr32(0xD0000004)
+    i = 0
+    while i < n:
+        gpio[0]
+        i += 1
+
+# what the POST wait loops actually do every time around
+def post_poll_bytecode(n):
+    mask = 0xFF << 15
+    for _ in range(n):
+        if (mem32[RP2040_GPIO_IN] & mask) == 0x1FF:
+            break
+
+@micropython.native
+def post_poll_native(n):
+    mask = 0xFF << 15
+    for _ in range(n):
+        if (mem32[RP2040_GPIO_IN] & mask) == 0x1FF:
+            break
+
+@micropython.viper
+def post_poll_viper(n: int):
+    gpio = ptr32(0xD0000004)
+    mask = 0xFF << 15
+    i = 0
+    while i < n:
+        if (gpio[0] & mask) == 0x1FF:
+            break
+        i += 1
+
+def ticks_bytecode(n):
+    for _ in range(n):
+        ticks_us()
+
+@micropython.native
+def ticks_native(n):
+    for _ in range(n):
+        ticks_us()
+
+@micropython.viper
+def ticks_viper(n: int):
+    i = 0
+    while i < n:
+        ticks_us()
+        i += 1
+
+def pin_read_bytecode(n):
+    pin = POST_PIN
+    for _ in range(n):
+        pin.value()
+
+@micropython.native
+def pin_read_native(n):
+    pin = POST_PIN
+    for _ in range(n):
+        pin.value()
+
+def pin_write_bytecode(n):
+    led = LED
+    for _ in range(n):
+        led.value(1)
+
+@micropython.native
+def pin_write_native(n):
+    led = LED
+    for _ in range(n):
+        led.value(1)
+
+# the LED mirroring rgh12_4wire and pmd4 do in their wait loops
+def led_mirror_bytecode(n):
+    led = LED
+    pin = POST_PIN
+    for _ in range(n):
+        led.value(pin.value())
+
+@micropython.native
+def led_mirror_native(n):
+    led = LED
+    pin = POST_PIN
+    for _ in range(n):
+        led.value(pin.value())
+
+@rp2.asm_pio()
+def echo():
+    # every word put in comes straight back out
+    wrap_target()
+    pull(block)
+    mov(isr, osr)
+    push(block)
+    wrap()
+
+def sm_put_get_bytecode(n, sm):
+    for _ in range(n):
+        sm.put(1)
+        sm.get()
+
+@micropython.native
+def sm_put_get_native(n, sm):
+    for _ in range(n):
+        sm.put(1)
+        sm.get()
+
+def sm_active_bytecode(n, sm):
+    for _ in range(n):
+        sm.active(1)
+
+def i2c_bytecode(n, i2c):
+    buf = bytes([0x01, 0xFF])
+    for _ in range(n):
+        try:
+            i2c.writeto_mem(0x69, 0, buf)
+        except OSError:
+            pass    # nothing there. still costs the same up to the NACK
+
+def print_bytecode(n):
+    for i in range(n):
+        print(f"d9 {i} usec")
+
+# ------------------------------------------------------------------------
+
+def _time(fcn, *args) -> int:
+    start = ticks_us()
+    fcn(*args)
+    return ticks_diff(ticks_us(), start)
+
+def _per_call_ns(fcn, empty, n, *args) -> float:
+    '''
+    ns per call of whatever `fcn` loops over, minus the cost of the empty loop.
+    '''
+    elapsed = _time(fcn, n, *args) - _time(empty, n)
+    return max(elapsed, 0) * 1000 / n
+
+def run_clock(clock: int) -> dict:
+    '''
+    Runs every benchmark at one system clock. Returns `{ name: ns per call }`.
+    '''
+    freq(clock)
+
+    sm = rp2.StateMachine(0, echo)
+    sm.active(1)
+    i2c = SoftI2C(sda=Pin(8),scl=Pin(9),freq=100000)
+
+    results = {}
+    for name, fcn, empty in [
+        ("mem32 read (bytecode)",   mem32_bytecode,     empty_bytecode),
+        ("mem32 read (native)",     mem32_native,       empty_native),
+        ("mem32 read (viper)",      mem32_viper,        empty_viper),
+        ("POST poll (bytecode)",    post_poll_bytecode, empty_bytecode),
+        ("POST poll (native)",      post_poll_native,   empty_native),
+        ("POST poll (viper)",       post_poll_viper,    empty_viper),
+        ("ticks_us (bytecode)",     ticks_bytecode,     empty_bytecode),
+        ("ticks_us (native)",       ticks_native,       empty_native),
+        ("ticks_us (viper)",        ticks_viper,        empty_viper),
+        ("Pin.value() (bytecode)",  pin_read_bytecode,  empty_bytecode),
+        ("Pin.value() (native)",    pin_read_native,    empty_native),
+        ("Pin.value(1) (bytecode)", pin_write_bytecode, empty_bytecode),
+        ("Pin.value(1) (native)",   pin_write_native,   empty_native),
+        ("LED mirror (bytecode)",   led_mirror_bytecode, empty_bytecode),
+        ("LED mirror (native)",     led_mirror_native,  empty_native),
+    ]:
+        results[name] = _per_call_ns(fcn, empty, ITERATIONS)
+
+    # loop time for the bare loops themselves, so the per-call numbers can be added back up
+    for name, empty in [ ("empty loop (bytecode)", empty_bytecode),
+                         ("empty loop (native)",   empty_native),
+                         ("empty loop (viper)",    empty_viper) ]:
+        results[name] = _time(empty, ITERATIONS) * 1000 / ITERATIONS
+
+    results["SM put+get (bytecode)"] = _per_call_ns(sm_put_get_bytecode, empty_bytecode, ITERATIONS, sm)
+    results["SM put+get (native)"]   = _per_call_ns(sm_put_get_native, empty_native, ITERATIONS, sm)
+    results["SM active() (bytecode)"] = _per_call_ns(sm_active_bytecode, empty_bytecode, ITERATIONS, sm)
+    sm.active(0)
+
+    results["SoftI2C write (bytecode)"] = _per_call_ns(i2c_bytecode, empty_bytecode, SLOW_ITERATIONS, i2c)
+    results["print (bytecode)"] = _per_call_ns(print_bytecode, empty_bytecode, SLOW_ITERATIONS)
+
+    LED.value(0)
+    return results
+
+def print_table(all_results: dict):
+    clocks = list(all_results.keys())
+    names = list(all_results[clocks[0]].keys())
+
+    # micropython's str has no ljust()
+    print("%-28s" % "ns per call" + "".join(f"{int(clock) // 1000000:>10} MHz" for clock in clocks))
+    for name in names:
+        print("%-28s" % name + "".join(f"{all_results[clock][name]:>14.0f}" for clock in clocks))
+
+def main():
+    original_clock = freq()
+    all_results = {}
+    try:
+        for clock in CLOCKS:
+            print(f"running benchmarks at {clock // 1000000} MHz...")
+            all_results[str(clock)] = run_clock(clock)
+    finally:
+        freq(original_clock)
+
+    # save first so the numbers are safe even if printing falls over
+    with open(RESULTS_FILE, "w") as f:
+        json.dump(all_results, f)
+    print(f"saved to {RESULTS_FILE}")
+    print_table(all_results)
+
+if __name__ == '__main__':
+    main()
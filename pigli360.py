@@ -1,27 +1,122 @@
 '''
 pigli360.py
 Common glitching framework because the scattered implementations were getting unmanagable
+
+This is big enough that compiling it takes a good chunk of startup. If the Pico gets power
+cycled with the console, run it through mpy-cross and copy pigli360.mpy over instead, and
+run precompile_pio_programs() once so the PIO programs don't get assembled on every boot either.
 '''
  
+from time import sleep, sleep_ms, ticks_ms, ticks_us, ticks_diff
+_IMPORT_TICKS = ticks_us()  # ticks_us() starts at power on, so this is how long it took to get here
+                            # (_IMPORT_DONE_TICKS at the bottom is when the import finished)
+
 import rp2
-from machine import Pin,mem32,SoftI2C
-from time import sleep, sleep_ms, ticks_us
+from rp2 import PIO
+from machine import Pin,mem32,SoftI2C,freq,disable_irq,enable_irq
+from array import array
+from uctypes import addressof
 from enum import Enum
+import json
+import gc
+import os
+import _thread
+
+# glitchsearch, timing, predictor, spscring, histogram and postwave only get imported
+# by the functions that use them, so a plain rgh12() boot doesn't have to compile them
 
 BOARD = 'pico'
 
 if BOARD == 'pico':
     POST_PIN_BASE_ID  = 15  # 15-22
     CPU_CTRL_BASE_ID  = 13  # 13 = PLL, 14 = reset
+    CPU_RESET_IN_ID   = 12
+    SMC_RST_N_ID      = 10  # -1 if not wired
+    EXT_PWR_ON_N_ID   = 11  # -1 if not wired
+    STATUS_LED_ID     = 25  # onboard LED, -1 if there isn't one
+    BENCH_OUT_BASE_ID = 1   # 1-9, bench mode only. see start_bench()
 elif BOARD == 'rp2040zero':
     POST_PIN_BASE_ID  = 0
     CPU_CTRL_BASE_ID  = 8
+    CPU_RESET_IN_ID   = 10
+    SMC_RST_N_ID      = 11
+    EXT_PWR_ON_N_ID   = 12
+    STATUS_LED_ID     = -1  # the onboard LED is a WS2812, can't just drive it
+    BENCH_OUT_BASE_ID = 13  # 13-21
 else:
     raise RuntimeError(f"unsupported board: {BOARD}")
 
+# calibrated values for this particular board and its wiring live on flash, see calibrate_post_skew()
+BOARD_PROFILE_FILE = f"board_{BOARD}.json"
+
+def load_board_profile() -> dict:
+    '''
+    Loads the board profile. Returns an empty one if nothing's been calibrated yet.
+    '''
+    try:
+        with open(BOARD_PROFILE_FILE) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_board_profile(profile: dict):
+    with open(BOARD_PROFILE_FILE, "w") as f:
+        json.dump(profile, f)
+
+BOARD_PROFILE = load_board_profile()
+
+def load_failure_predictor():
+    '''
+    Returns a FailurePredictor for the "failure_table" in the board profile (see predictor.py),
+    or None if there isn't one.
+    '''
+    from predictor import FailurePredictor
+    table = BOARD_PROFILE.get("failure_table")
+    return FailurePredictor(table) if table is not None else None
+
+# you have to set frequency to a multiple of 12 MHz, or this shit won't work.
+# use_clock_profile() can move this up once a faster clock has been validated
+SYSTEM_CLOCK = 192000000
+DEFAULT_SYSTEM_CLOCK = 192000000
+
 # POST monitoring must be done as fast as possible
 RP2040_GPIO_IN = 0xD0000004
 
+# PIO registers, for things the rp2 module won't let us do
+PIO0_BASE             = 0x50200000
+PIO1_BASE             = 0x50300000
+PIO_CTRL              = 0x000
+PIO_IRQ               = 0x030
+PIO_SM0_CLKDIV        = 0x0C8
+PIO_SM_REG_STRIDE     = 0x18
+RP2040_ATOMIC_SET     = 0x2000
+
+# TIMER registers. stage timeouts run off one of the hardware alarms so the POST loops
+# only have to check one bit instead of calling ticks_us() and doing maths every time around.
+# the port's soft timer (machine.Timer) is on alarm 2 and the SDK's default alarm pool on 3.
+# the SDK hands out unused alarms lowest first, so 1 is the least likely to get taken.
+# only the raw INTR bit gets used, so the alarm's interrupt stays off
+TIMER_BASE            = 0x40054000
+TIMER_ALARM0          = 0x010
+TIMER_ARMED           = 0x020
+TIMER_TIMERAWL        = 0x028
+TIMER_INTR            = 0x034
+TIMER_INTE            = 0x038
+STAGE_TIMEOUT_ALARM   = 1
+STAGE_TIMEOUT_MASK    = 1 << STAGE_TIMEOUT_ALARM
+
+# DMA request lines. PIOn TX FIFO m is n * 8 + m, RX FIFO m is n * 8 + 4 + m
+DREQ_PIO0_TX0         = 0
+DREQ_PIO0_RX0         = 4
+
+def _pio_dreq(sm_id: int, base: int) -> int:
+    return (sm_id >> 2) * 8 + base + (sm_id & 3)
+
+# DMA channel registers, for chaining one channel into restarting another
+DMA_BASE                  = 0x50000000
+DMA_CH_STRIDE             = 0x40
+DMA_CH_AL3_READ_ADDR_TRIG = 0x03C
+
 POST_IO_BASE = 15
 POST_BITS_MASK = 0xFF << POST_PIN_BASE_ID
 def _make_post(x):
@@ -46,6 +141,21 @@ POST_11 = _make_post(0x11)
 '''
 '''
 
+POST_18 = _make_post(0x18)
+'''
+CB is being read by the bootrom.
+'''
+
+POST_19 = _make_post(0x19)
+'''
+CB hash being computed by the bootrom. CAboom starts its PIO here.
+'''
+
+POST_D0 = _make_post(0xD0)
+'''
+CB_A has started. Getting here means the CPU came out of reset cleanly.
+'''
+
 POST_D5 = _make_post(0xD5)
 '''
 `FETCH_CONTENTS_CB_B`. Copy CB_B from flash into SRAM. setup for 0xD6
@@ -58,6 +168,9 @@ CB_A won't touch flash past this point, so this makes it
 an ideal point to start our workflows
 '''
 
+POST_D7 = _make_post(0xD7)
+POST_D8 = _make_post(0xD8)
+
 POST_D9 = _make_post(0xD9)
 '''
 `SHA_COMPUTE_CB_B`. Compute SHA hash of CB_B. Typically where slowdown is applied for RGH1.2.
@@ -77,6 +190,16 @@ POST_20 = _make_post(0x20)
 POST_21 = _make_post(0x21)
 POST_22 = _make_post(0x22)
 
+POST_54 = _make_post(0x54)
+'''
+CB_X stage a failed RGH1.3 attempt always dies on.
+'''
+
+POST_F2 = _make_post(0xF2)
+'''
+Hash check mismatch. What 0xDA goes to when the reset pulse is too late.
+'''
+
 POST_FB = _make_post(0xFB)
 '''
 CB_B hash check failed, CPU halted.
@@ -111,28 +234,227 @@ CPU_RESET           = Pin(CPU_CTRL_BASE_ID + 1, Pin.IN)   # will switch to outpu
 CPU_PLL_BYPASS      = Pin(CPU_CTRL_BASE_ID,     Pin.OUT)  # via 22k resistor. for EXT_CLK, this pin connects to CPU_EXT_CLK_EN
 
 FAIL_SIGNAL         = Pin(0, Pin.OUT)   # connect this to SMC DBG_LED if the SMC code is hacked to read it
+STATUS_LED          = Pin(STATUS_LED_ID, Pin.OUT) if STATUS_LED_ID >= 0 else None
+
+# inputs other than POST
+CPU_RESET_IN        = Pin(CPU_RESET_IN_ID, Pin.IN, Pin.PULL_UP) # to FT2P11 under southbridge. needed for single-wire mode
+
+# last resort reset lines, both open drain so they only ever get driven low. see ResetController
+SMC_RST_N           = Pin(SMC_RST_N_ID, Pin.IN) if SMC_RST_N_ID >= 0 else None          # to J2B1 pin 5, also R2P18
+EXT_PWR_ON_N        = Pin(EXT_PWR_ON_N_ID, Pin.IN) if EXT_PWR_ON_N_ID >= 0 else None    # to J2B1 pin 11 (WARNING: THERE'S 5V RIGHT NEXT TO IT)
+
+# IRQ the POST tracker raises to release the resetter in single-wire mode.
+# 4-7 don't go anywhere near the ARM's interrupt lines
+POSTTRACKER_IRQ = 4
+
+# IRQ the single-wire resetter raises when it's done. 0-3 are visible to the ARM
+RESETTER_DONE_IRQ = 0
+
+# IRQ the resetter raises when its fail-fast watcher has reset the console. also visible to the ARM
+FAIL_FAST_IRQ = 1
+
+# what the resetter does about a failed hash check, see _build_pio_glitch2_resetter_code()
+FAIL_FAST_OFF       = 0     # nothing, Python deals with it
+FAIL_FAST_CPU_RESET = 1     # pulse /CPU_RESET
+FAIL_FAST_DBG_LED   = 2     # pulse FAIL_SIGNAL, for SMC images that reset on DBG_LED
 
 # map pointing postcode -> timeout_in_usec. needed to speedup timeouts
 POST_TIMEOUT_TABLE = {
-    _make_post(0x22): 10000
+    POST_DB: 200000,
+    _make_post(0x22): 10000,
+    POST_54: 80000,    # CB_X always dies here on a failed RGH1.3 attempt
 }
 
+# module level so checking against them doesn't build a new list every time
+POST_AFTER_GLITCH_OK = (POST_DB, POST_20, POST_21, POST_22)
+POST_XELL            = (POST_10, POST_11)
+
 class GlitchResult(Enum):
     GLITCH_OK = 0
     GLITCH_SMC_TIMEOUT = 1
     GLITCH_SIGNATURE_CHECK_FAILED = 2
     GLITCH_POSTGLITCH_TIMEOUT = 3
+    GLITCH_PREDICTED_FAIL = 4
+    GLITCH_CPU_RESET = 5        # CPU went straight from 0xDA to 0x00, i.e. the pulse came too early
 
 # ---------------------------------------------------------------------------------------
 
-def _build_pio_glitch2_posttracker_program(num_toggles_before_irq: int):
+# assembled PIO programs, keyed by builder and arguments. see _pio_program()
+_PIO_PROGRAMS = {}
+_pio_program_cache = None
+
+PIO_PROGRAM_CACHE_FILE = "pio_cache.json"
+
+def _pio_source_hash() -> str:
+    '''
+    sha256 of this module's file (the .py, or the .mpy if it's been through mpy-cross).
+    The cache is only good for the exact source it was built from, so any edit to a
+    _build_pio_* function throws it out. Empty if there's no file to hash (frozen in).
+    '''
+    from hashlib import sha256
+    from binascii import hexlify
+
+    h = sha256()
+    try:
+        with open(__file__, "rb") as f:
+            while True:
+                chunk = f.read(1024)
+                if not chunk:
+                    break
+                h.update(chunk)
+    except (OSError, NameError):
+        return ""
+    return hexlify(h.digest()).decode()
+
+def _pio_program_key(builder, args: tuple, kwargs: dict) -> str:
+    return f"{builder.__name__}{args}{sorted(kwargs.items())}"
+
+def _load_pio_program_cache() -> dict:
+    try:
+        with open(PIO_PROGRAM_CACHE_FILE) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    source = _pio_source_hash()
+    if not isinstance(cache, dict) or source == "" or cache.get("source") != source:
+        print("PIO program cache is out of date, ignoring it. run precompile_pio_programs() again")
+        return {}
+    return cache.get("programs", {})
+
+def _pio_program(builder, *args, **kwargs):
+    '''
+    Returns `builder(*args, **kwargs)`, only assembling it the first time it's asked for,
+    and not at all if precompile_pio_programs() already put it in the cache on flash.
+    '''
+    global _pio_program_cache
+
+    key = _pio_program_key(builder, args, kwargs)
+    prg = _PIO_PROGRAMS.get(key)
+    if prg is not None:
+        return prg
+
+    if _pio_program_cache is None:
+        _pio_program_cache = _load_pio_program_cache()
+
+    # asm_pio() hands back a list with the instructions in an array first,
+    # then the load offsets (-1 until loaded) and the statemachine config words
+    entry = _pio_program_cache.get(key)
+    if entry is not None:
+        prg = [ array("H", entry[0]) ] + entry[1:]
+    else:
+        prg = builder(*args, **kwargs)
+
+    _PIO_PROGRAMS[key] = prg
+    return prg
+
+def precompile_pio_programs(variants: list = None):
+    '''
+    Assembles PIO programs and saves the raw instruction words to flash, so _pio_program()
+    can load them on later boots instead of running the assembler. Entries are keyed by
+    builder name and arguments, and the whole cache by a hash of this file, so it has to be
+    run again after every edit.
+
+    Parameters:
+    - variants: `(builder, args, kwargs)` tuples to precompile. Default is None
+                (the programs the fixed-setting workflows use).
+    '''
+    if variants is None:
+        variants = [
+            (_build_pio_glitch2_resetter_code, (4,), {}),
+            (_build_pio_glitch2_resetter_code, (0,), { "control_pll": True, "runtime_pulse_shape": True }),
+            (_build_pio_transitiongetter_code, (TRANSITION_DA_F2[2],), {}),
+            (_build_pio_transitiongetter_code, (TRANSITION_1D_96[2],), {}),
+            (_build_pio_post_capture_code, (), {}),
+            (_build_pio_debounced_post_capture_code, (post_stable_samples(),), {}),
+        ]
+
+    cache = {}
+    for builder, args, kwargs in variants:
+        # build fresh, a program that's been loaded has its offsets filled in
+        prg = builder(*args, **kwargs)
+        cache[_pio_program_key(builder, args, kwargs)] = [ list(prg[0]) ] + list(prg[1:])
+
+    with open(PIO_PROGRAM_CACHE_FILE, "w") as f:
+        json.dump({ "source": _pio_source_hash(), "programs": cache }, f)
+
+    global _pio_program_cache
+    _pio_program_cache = cache
+    print(f"precompiled {len(cache)} PIO programs")
+
+def load_pio_plan(entries: list) -> tuple:
+    '''
+    Loads several programs at once, packed into the PIO blocks by pioplan.plan_pio(),
+    so they can all run together without reloading anything between attempts.
+
+    Everything that was loaded through _pio_program() gets unloaded first.
+
+    Parameters:
+    - entries: `(name, program, group, statemachine_kwargs)` tuples. Programs in the same
+               group (anything that shares IRQs) are put in the same block.
+               statemachine_kwargs go to rp2.StateMachine() (freq, in_base, etc).
+
+    Returns `(statemachines, sm_ids)`, two dicts mapping name -> StateMachine (not started)
+    and name -> statemachine number (the PIO block is `sm_id // 4`).
+    '''
+    from pioplan import PioJob, plan_pio, report_plan, PIO_BLOCKS, PIO_STATEMACHINES
+
+    programs = {}
+    jobs = []
+    kwargs = {}
+    for name, prg, group, sm_kwargs in entries:
+        programs[id(prg)] = prg
+        jobs.append(PioJob(name, id(prg), len(prg[0]), group))
+        kwargs[name] = sm_kwargs
+
+    placements = plan_pio(jobs)
+
+    # the plan gets every statemachine, including the indicator's
+    stop_indicator()
+    for block in range(PIO_BLOCKS):
+        for i in range(PIO_STATEMACHINES):
+            rp2.StateMachine(block * PIO_STATEMACHINES + i).active(0)
+        pio = rp2.PIO(block)
+        for prg in _PIO_PROGRAMS.values():
+            pio.remove_program(prg)
+
+    statemachines = {}
+    sm_ids = {}
+    for placement in placements:
+        name = placement.job.name
+        prg = programs[placement.job.program_key]
+        rp2.PIO(placement.block).add_program(prg)
+        statemachines[name] = rp2.StateMachine(placement.sm_id, prg, **kwargs[name])
+        sm_ids[name] = placement.sm_id
+
+    report_plan(placements)
+    return (statemachines, sm_ids)
+
+_armed_reported = False
+
+def _report_armed():
+    '''
+    Prints how long it took from power on to the first attempt being armed, once,
+    and how much of that was importing this module.
+    '''
+    global _armed_reported
+    if not _armed_reported:
+        _armed_reported = True
+        now = ticks_us()
+        print(f"cold boot: import started at {_IMPORT_TICKS} usec, took {_IMPORT_DONE_TICKS - _IMPORT_TICKS} usec, "
+              f"armed at {now} usec")
+
+def _build_pio_glitch2_posttracker_program(num_toggles_before_irq: int, irq_number: int, reset_in_gpio: int):
     '''
     Builds POST tracker PIO program, needed for single-wire mode.
 
+    The statemachine's jmp pin must be CPU_RESET_IN and its in_base the POST bit being tracked.
+    Counting starts when /CPU_RESET rises and starts over if it's low after any toggle.
+
     Parameters:
     - num_toggles_before_irq: Number of times the POST signal should toggle
-                              before raising IRQ.
+                              before raising IRQ. Must be between 2 and 64.
     - irq_number: IRQ ID to raise.
+    - reset_in_gpio: GPIO number of CPU_RESET_IN.
     '''
     # glitch2 post sequence
     # POST | bit 0 | bit 1
@@ -164,34 +486,35 @@ def _build_pio_glitch2_posttracker_program(num_toggles_before_irq: int):
     # POST bit 0 - 20 transitions, ending on 0
     # POST bit 1 - 11 transitions, ending on 1
 
+    if not (2 <= num_toggles_before_irq <= 64):
+        raise RuntimeError("num_toggles_before_irq must be within 2-64")
+
+    pairs = num_toggles_before_irq >> 1
+
     @rp2.asm_pio()
     def posttrack():
-        set(x, num_toggles_before_irq >> 1)
         wrap_target()
         label("start_over")
-        move(y, x)
+        set(x, pairs - 1)
+
+        # wait for the next reset to come and go
+        # (this shares a PIO block with the resetter, so every instruction counts)
         label("wait_reset_fall")
         jmp(pin, "wait_reset_fall")
-        label("wait_reset_rise")
-        jmp(pin, "reset_rose")
-        jmp("wait_reset_rise")
-        label("reset_rose")
-        
+        wait(1, gpio, reset_in_gpio)
+
         # track 0 -> 1 -> 0 transitions.
         # if /CPU_RESET falls, start over.
-        label("wait_post_rise")
-        wait(1, pin)
-        jmp(pin, "wait_post_fall")
+        label("count")
+        wait(1, pin, 0)
+        wait(0, pin, 0)
+        jmp(pin, "still_running")
         jmp("start_over")
-        label("wait_post_fall")
-        wait(0, pin)
-        jmp(pin, "decrement_and_repeat")
-        label("decrement_and_repeat")
-        jmp(x_dec, "wait_post_rise")
+        label("still_running")
+        jmp(x_dec, "count")
 
         if (num_toggles_before_irq & 1) != 0:
-            label("wait_final_post_rise")
-            wait(1, pin)
+            wait(1, pin, 0)
             jmp(pin, "done")
             jmp("start_over")
             label("done")
@@ -202,12 +525,439 @@ def _build_pio_glitch2_posttracker_program(num_toggles_before_irq: int):
 
     return posttrack
 
+# statemachine cycles per sample in _build_pio_post_match_trigger() while it's counting
+# matching samples (stable_samples > 1)
+POST_MATCH_CYCLES_PER_SAMPLE = 8
+
+def _build_pio_post_match_trigger(stable_samples: int, irq_number: int):
+    '''
+    Builds a POST trigger that fires on an exact 8-bit POST code match instead of counting edges,
+    so a glitchy edge can't shift the trigger by a whole stage.
+
+    The statemachine's in_base must be DBG_CPU_POST_OUT7 (POST bit 0). Put the POST code to
+    trigger on (unshifted, e.g. 0xDA) before starting it. To retarget it, restart the
+    statemachine and put a new code; nothing needs reassembling.
+
+    Once it's fired, it waits for the POST code to change before it can fire again.
+
+    Parameters:
+    - stable_samples: Number of samples in a row that have to match before it fires.
+                      1 fires on the first match. Must be between 1 and 32.
+                      Each sample after the first takes POST_MATCH_CYCLES_PER_SAMPLE statemachine cycles.
+    - irq_number: IRQ ID to raise.
+    '''
+    if not (1 <= stable_samples <= 32):
+        raise RuntimeError("stable_samples must be within 1-32")
+
+    @rp2.asm_pio()
+    def postmatch():
+        pull(block)
+        mov(y, osr)                     # y = target POST code
+
+        # OSR counts matching samples from here on
+        label("restart")
+        if stable_samples > 1:
+            set(x, stable_samples - 1)
+            mov(osr, x)
+
+        label("sample")
+        mov(isr, null)
+        in_(pins, 8)
+        mov(x, isr)
+        jmp(x_not_y, "restart")
+        if stable_samples > 1:
+            mov(x, osr)
+            jmp(x_dec, "stable")
+
+        irq(irq_number)
+
+        # don't fire again until the code changes
+        label("wait_change")
+        mov(isr, null)
+        in_(pins, 8)
+        mov(x, isr)
+        jmp(x_not_y, "restart")
+        jmp("wait_change")
+
+        if stable_samples > 1:
+            label("stable")
+            mov(osr, x)
+            jmp("sample")
+
+    return postmatch
+
+# statemachine cycles per sample in _build_pio_post_capture_code()
+POST_CAPTURE_CYCLES_PER_SAMPLE = 9
+
+def _build_pio_post_capture_code():
+    '''
+    Builds a POST capture program, used to calibrate POST wiring skew.
+
+    The statemachine's in_base must be DBG_CPU_POST_OUT7 (POST bit 0). Every time the POST code
+    changes, it pushes two words: the new code, then `0xFFFFFFFF - n` where n + 1 is the number of
+    samples the previous code was held for. Every path through the loop takes
+    POST_CAPTURE_CYCLES_PER_SAMPLE cycles.
+    '''
+
+    @rp2.asm_pio(fifo_join=PIO.JOIN_RX)
+    def postcapture():
+        mov(y, invert(null))            # nothing matches this, so the first sample gets pushed
+        mov(osr, invert(null))
+
+        wrap_target()
+        mov(isr, null)
+        in_(pins, 8)
+        mov(x, isr)
+        jmp(x_not_y, "changed")
+        mov(x, osr)
+        jmp(x_dec, "next")
+        label("next")
+        mov(osr, x)
+        jmp("done") [1]                 # same length as the changed path
+
+        label("changed")
+        mov(y, x)
+        push(noblock)
+        mov(isr, osr)
+        push(noblock)
+        mov(osr, invert(null))
+        label("done")
+        wrap()
+
+    return postcapture
+
+def _build_pio_settled_post_sampler():
+    '''
+    Builds a POST sampler that only reports codes once they've settled.
+
+    When the POST code changes, it waits out the settle time (put it in the TX FIFO
+    before starting, in statemachine cycles, see post_settle_cycles()), samples again
+    and pushes that. The in-between codes the diodes produce never make it to the FIFO,
+    so there's nothing to debounce in software.
+
+    The statemachine's in_base must be DBG_CPU_POST_OUT7 (POST bit 0).
+    '''
+
+    @rp2.asm_pio(fifo_join=PIO.JOIN_RX)
+    def settledsampler():
+        pull(block)                     # OSR = settle loop count, stays there
+        mov(y, invert(null))
+
+        label("sample")
+        mov(isr, null)
+        in_(pins, 8)
+        mov(x, isr)
+        jmp(x_not_y, "changed")
+        jmp("sample")
+
+        label("changed")
+        mov(x, osr)
+        label("settle")
+        jmp(x_dec, "settle")
+        mov(isr, null)
+        in_(pins, 8)
+        mov(y, isr)
+        push(noblock)
+        jmp("sample")
+
+    return settledsampler
+
+def post_settle_cycles(sm_freq: int) -> int:
+    '''
+    Settle time from the board profile, in cycles at sm_freq. 0 if the board hasn't been calibrated.
+    '''
+    settle_ns = BOARD_PROFILE.get("post_settle_ns", 0)
+    return int(settle_ns * sm_freq / 1e9 + 0.999)
+
+# statemachine cycles per sample while _build_pio_debounced_post_capture_code() is checking a code
+POST_DEBOUNCE_CYCLES_PER_SAMPLE = 8
+
+# what the debounced capture pushes when it throws a code away
+POST_DEBOUNCE_REJECTED = 0xFFFFFFFF
+
+def _build_pio_debounced_post_capture_code(stable_samples: int):
+    '''
+    Builds a debounced POST capture program.
+
+    A new POST code is only pushed once it's been sampled `stable_samples` times in a row.
+    Codes that change before then (the in-between codes the diodes produce, mostly)
+    are thrown away and POST_DEBOUNCE_REJECTED is pushed instead, so whoever's reading
+    the FIFO can count them.
+
+    The statemachine's in_base must be DBG_CPU_POST_OUT7 (POST bit 0).
+
+    Parameters:
+    - stable_samples: Number of samples in a row a code has to hold for. Must be between 2 and 32.
+    '''
+    if not (2 <= stable_samples <= 32):
+        raise RuntimeError("stable_samples must be within 2-32")
+
+    @rp2.asm_pio(fifo_join=PIO.JOIN_RX)
+    def debouncedcapture():
+        mov(y, invert(null))
+        jmp("wait_change")
+
+        # x = new code. y holds the code being checked, OSR counts samples
+        label("new_code")
+        mov(y, x)
+        set(x, stable_samples - 2)      # the sample that found the new code counts too
+        mov(osr, x)
+
+        label("check")
+        mov(isr, null)
+        in_(pins, 8)
+        mov(x, isr)
+        jmp(x_not_y, "rejected")
+        mov(x, osr)
+        jmp(x_dec, "held")
+
+        # held long enough, report it
+        mov(isr, y)
+        push(noblock)
+
+        label("wait_change")
+        mov(isr, null)
+        in_(pins, 8)
+        mov(x, isr)
+        jmp(x_not_y, "new_code")
+        jmp("wait_change")
+
+        label("held")
+        mov(osr, x)
+        jmp("check")
+
+        label("rejected")
+        mov(isr, invert(null))
+        push(noblock)
+        jmp("new_code")
+
+    return debouncedcapture
+
+def post_stable_samples() -> int:
+    '''
+    Number of samples the debounced capture wants a code to hold for on this board.
+    "post_stable_samples" in the board profile if it's there, otherwise enough
+    to cover the calibrated settle time, otherwise 4.
+    '''
+    if "post_stable_samples" in BOARD_PROFILE:
+        return BOARD_PROFILE["post_stable_samples"]
+    if "post_settle_ns" in BOARD_PROFILE:
+        cycles = post_settle_cycles(SYSTEM_CLOCK)
+        return max(2, min(32, (cycles + POST_DEBOUNCE_CYCLES_PER_SAMPLE - 1) // POST_DEBOUNCE_CYCLES_PER_SAMPLE + 1))
+    return 4
+
+class DebouncedPostCapture:
+    '''
+    Reads POST codes off a debounced capture statemachine and keeps count of rejected codes,
+    which makes a decent signal quality metric for the POST wiring.
+    '''
+
+    def __init__(self, sm_id: int = 4, stable_samples: int = -1, sm = None):
+        '''
+        Parameters:
+        - sm_id: Statemachine to run on. Default is 4 (PIO1) to stay out of the glitch programs' way.
+        - stable_samples: Samples a code has to hold for. Default is -1 (use post_stable_samples()).
+        - sm: Optional statemachine that's already set up with the capture program
+              (see load_pio_plan()). sm_id is ignored if this is given.
+        '''
+        if stable_samples < 0:
+            stable_samples = post_stable_samples()
+        self.stable_samples = stable_samples
+        self.rejected = 0
+        self.reported = 0
+        if sm is None:
+            sm = rp2.StateMachine(sm_id,
+                                  _pio_program(_build_pio_debounced_post_capture_code, stable_samples),
+                                  freq = SYSTEM_CLOCK,
+                                  in_base=DBG_CPU_POST_OUT7)
+        self.sm = sm
+
+    def start(self):
+        self.sm.active(1)
+
+    def stop(self):
+        self.sm.active(0)
+
+    def poll(self) -> int:
+        '''
+        Returns the next debounced POST code (unshifted), or -1 if there isn't one yet.
+        '''
+        while self.sm.rx_fifo() != 0:
+            word = self.sm.get()
+            if word == POST_DEBOUNCE_REJECTED:
+                self.rejected += 1
+            else:
+                self.reported += 1
+                return word
+        return -1
+
+    def reject_rate(self) -> float:
+        '''
+        Rejected codes per real one.
+        '''
+        if self.reported == 0:
+            return 0.0
+        return self.rejected / self.reported
+
+# indicator statemachine clock. the pulse loop is 2 cycles, so this makes it 1 usec per loop
+INDICATOR_FREQ  = 2000000
+INDICATOR_SM_ID = 7     # last one on PIO1, out of everybody's way
+
+def _build_pio_indicator_code(mirror_led: bool = True):
+    '''
+    Builds the indicator program: copies POST bit 0 onto the status LED (out pin 0) nonstop,
+    and pulses FAIL_SIGNAL (set pin 0) high for however many usec get put in the TX FIFO
+    (at INDICATOR_FREQ). The LED keeps following POST during the pulse.
+
+    in_base must be POST bit 0 (DBG_CPU_POST_OUT7).
+
+    Parameters:
+    - mirror_led: If False, the LED isn't touched and out_base doesn't need setting.
+                  Default is True.
+    '''
+
+    out_init = PIO.OUT_LOW if mirror_led else None
+
+    @rp2.asm_pio(set_init=PIO.OUT_LOW, out_init=out_init)
+    def indicator():
+        set(x, 0)                   # pull noblock hands us this when there's nothing to do
+
+        wrap_target()
+        if mirror_led:
+            mov(pins, pins)
+        pull(noblock)
+        mov(y, osr)
+        jmp(not_y, "idle")
+
+        set(pins, 1)
+        label("pulse")
+        if mirror_led:
+            mov(pins, pins)
+        else:
+            nop()
+        jmp(y_dec, "pulse")
+        set(pins, 0)
+        label("idle")
+        wrap()
+
+    return indicator
+
+class Indicator:
+    '''
+    Status LED and FAIL_SIGNAL (DBG_LED) handled by a PIO statemachine, so wait loops
+    don't have to mirror POST onto the LED themselves and failure pulses don't sleep.
+    Use start_indicator() rather than making one of these yourself.
+    '''
+
+    def __init__(self, sm_id: int = INDICATOR_SM_ID):
+        mirror_led = STATUS_LED is not None
+        kwargs = { "out_base": STATUS_LED } if mirror_led else {}
+        self.sm = rp2.StateMachine(sm_id,
+                                   _pio_program(_build_pio_indicator_code, mirror_led),
+                                   freq = INDICATOR_FREQ,
+                                   in_base=DBG_CPU_POST_OUT7,
+                                   set_base=FAIL_SIGNAL,
+                                   **kwargs)
+        self.sm.active(1)
+
+    def pulse(self, usec: int):
+        '''
+        Pulses FAIL_SIGNAL high for `usec` microseconds. Doesn't wait unless 4 pulses are already queued.
+        '''
+        self.sm.put(max(usec, 1))
+
+    def stop(self):
+        self.sm.active(0)
+        FAIL_SIGNAL.init(Pin.OUT, value = 0)
+        if STATUS_LED is not None:
+            STATUS_LED.init(Pin.OUT, value = 0)
+
+_indicator = None
+
+def start_indicator():
+    '''
+    Starts the indicator statemachine. _signal_fail() uses it from then on.
+    load_pio_plan() needs every statemachine, so it stops the indicator; start it again afterwards
+    if the plan left INDICATOR_SM_ID free.
+    '''
+    global _indicator
+    if _indicator is None:
+        freq(SYSTEM_CLOCK)
+        _indicator = Indicator()
+
+def stop_indicator():
+    '''
+    Stops the indicator and gives FAIL_SIGNAL back to Python.
+    '''
+    global _indicator
+    if _indicator is not None:
+        _indicator.stop()
+        _indicator = None
+
+HISTOGRAM_FILE = "histograms.json"
+
+_histograms = None
+
+def start_histograms(path: str = HISTOGRAM_FILE):
+    '''
+    Starts keeping transition timings (0xD6 -> 0xD9, 0xD9 -> 0xDA, 0xDA -> 0xF2, 0x54 dwell,
+    0x1D -> 0x96) in histograms, carrying on from whatever's saved in `path`.
+    They get saved every HistogramSet.save_every attempts and by stop_histograms().
+    Call `.report()` or `.export_csv()` on what this returns (or export_histograms()) any time.
+    '''
+    from histogram import HistogramSet
+
+    global _histograms
+    if _histograms is None:
+        _histograms = HistogramSet(path)
+        if _histograms.load():
+            print(f"histograms: carrying on from {path}")
+    return _histograms
+
+def stop_histograms():
+    '''
+    Saves the histograms and stops adding to them.
+    '''
+    global _histograms
+    if _histograms is not None:
+        _histograms.save()
+        _histograms = None
+
+def export_histograms(path: str = "histograms.csv"):
+    '''
+    Prints a summary and writes every histogram to one CSV file, whether or not they're running.
+    '''
+    from histogram import HistogramSet
+
+    histograms = _histograms
+    if histograms is None:
+        histograms = HistogramSet(HISTOGRAM_FILE)
+        histograms.load()
+    histograms.report()
+    histograms.export_csv(path)
+    print(f"histograms exported to {path}")
+
+def _default_wait_chains(use_post_bit_1: bool = False) -> tuple:
+    '''
+    `(pll_chain, reset_chain)` from POST 0xD6 to 0xD9 and then 0xDA, on POST bit 0 or bit 1.
+    '''
+    if use_post_bit_1:
+        return ([ (0, 1) ],                         # 0xD8/D9
+                [ (1, 1) ])                         # 0xDA
+    return ([ (1, 0), (0, 0), (1, 0) ],             # 0xD7, 0xD8, 0xD9
+            [ (0, 0) ])                             # 0xDA
+
 def _build_pio_glitch2_resetter_code( \
                              reset_pulse_width: int,
                              push_after_finish: bool = False,
                              control_pll:    bool = False,
                              use_post_bit_1: bool = False,
-                             wait_on_irq: int = -1) -> list:
+                             wait_on_irq: int = -1,
+                             runtime_pulse_shape: bool = False,
+                             done_irq: int = -1,
+                             wait_chains: tuple = None,
+                             loop_on_reset_gpio: int = -1,
+                             fail_fast: int = FAIL_FAST_OFF) -> list:
     '''
     Builds common PIO resetter code for Glitch2-based attacks.
 
@@ -219,157 +969,815 @@ def _build_pio_glitch2_resetter_code( \
                          Your script can then pick up on this by running `get()` on the statemachine.
                          Default is False (do not push instruction).
     - control_pll: If True, the PIO program will be built to control CPU_PLL_BYPASS/CPU_EXT_CLK_EN.
+                   set_base must be CPU_PLL_BYPASS in this case (CPU_RESET is the pin after it),
+                   otherwise set_base must be CPU_RESET.
     - use_post_bit_1: If True, the PIO program will be built to track POST bit 1 rises/falls.
                       Default is False (track POST bit 0 rises/falls instead).
     - wait_on_irq: Wait for the given IRQ to be set before code runs, then clears it.
       Default is -1 (don't wait).
-      Note that the PLL and reset delays will not be repopulated; your script needs to do that.
+      In this mode the program loops back to wait for the IRQ again once the pulse is done,
+      and the PLL and reset delays stick around between attempts. Your script can put new ones
+      (in the same order: PLL delay first if control_pll is set, then reset delay) whenever it likes.
+      push_after_finish can't be used here because push would clear the reset delay; use done_irq.
+    - runtime_pulse_shape: If True, reset_pulse_width is ignored and the pulse shape is pulled
+                           from the TX FIFO as a third word (see pack_pulse_shape()), so it can
+                           change every attempt without reassembling anything. The same word is
+                           pushed back once the pulse is done, as an acknowledgement that a pulse
+                           with that shape went out. It's an echo, not a measurement: the loops
+                           are cycle exact, so the PIO has nothing of its own to report. Use a
+                           PulseVerifier to see what /CPU_RESET actually did.
+                           Default is False (pulse width fixed at assembly time).
+    - done_irq: Raise the given IRQ once the pulse is done. Default is -1 (don't).
+    - wait_chains: `(pll_chain, reset_chain)` from posttrigger.compile_post_trigger(), i.e. the
+                   waits that get us to the PLL delay (POST 0xD9) and then to the reset delay
+                   (POST 0xDA). Overrides use_post_bit_1. The statemachine has to be started
+                   on the first POST code of whatever sequence pll_chain was compiled from.
+                   Default is None (wait from POST 0xD6 using bit 0 or bit 1).
+    - loop_on_reset_gpio: If given, the program waits for /CPU_RESET to fall and rise on this GPIO
+                          (CPU_RESET_IN), blocks for a fresh set of delays from the TX FIFO,
+                          does the attempt and loops back for the next reset, forever.
+                          Meant for DMA feeding it a schedule (see glitch2_scheduled()).
+                          Use wait_chains compiled from POST 0x00 with this.
+                          Can't be combined with wait_on_irq. Default is -1 (run one attempt).
+    - fail_fast: FAIL_FAST_CPU_RESET or FAIL_FAST_DBG_LED to keep watching POST once the pulse
+                 is done. If POST bit 5 rises before bit 0 does (0xDA -> 0xF2 instead of 0xDB),
+                 the program resets the console itself (~0.7 ms pulse at 48 MHz), then raises
+                 FAIL_FAST_IRQ. jmp_pin must be POST bit 5, and for FAIL_FAST_DBG_LED out_base
+                 must be FAIL_SIGNAL. Only works in the default single attempt mode.
+                 Costs 13 instructions, so it doesn't fit with control_pll + runtime_pulse_shape.
+                 Default is FAIL_FAST_OFF (leave it to Python).
     '''
 
-    if (0 <= reset_pulse_width <= 31):
+    if not (0 <= reset_pulse_width <= 31):
         raise RuntimeError("reset_pulse_width must be within 0-31. recommended is 1-3")
 
-    @rp2.asm_pio()
+    if wait_on_irq != -1 and loop_on_reset_gpio != -1:
+        raise RuntimeError("wait_on_irq and loop_on_reset_gpio can't be combined")
+
+    if fail_fast != FAIL_FAST_OFF and (wait_on_irq != -1 or loop_on_reset_gpio != -1):
+        raise RuntimeError("fail_fast only works with single attempt resetters")
+
+    if wait_on_irq != -1 and (runtime_pulse_shape or push_after_finish):
+        raise RuntimeError("runtime_pulse_shape/push_after_finish can't be combined with wait_on_irq, " \
+                           "they all need the OSR and ISR")
+
+    if wait_chains is not None:
+        pll_chain, reset_chain = wait_chains
+    else:
+        pll_chain, reset_chain = _default_wait_chains(use_post_bit_1)
+
+    # /CPU_RESET is set pin 1 if we're controlling the PLL, otherwise it's set pin 0
+    set_init   = [PIO.OUT_LOW, PIO.IN_LOW] if control_pll else [PIO.IN_LOW]
+    reset_bits = 3 if control_pll else 1
+
+    # FAIL_SIGNAL has to belong to the PIO to get pulsed from it
+    out_init = PIO.OUT_LOW if fail_fast == FAIL_FAST_DBG_LED else None
+    fail_fast_irq = FAIL_FAST_IRQ
+
+    @rp2.asm_pio(set_init=set_init, out_init=out_init)
     def resetter():
         if wait_on_irq != -1:
-            wait(wait_on_irq, irq, 1)
-            irq(clear, wait_on_irq)
+            # between attempts the ISR holds the reset delay and the OSR holds the PLL delay.
+            # pull noblock copies x to the OSR if the FIFO's empty, so putting the old value in x
+            # first means we keep it unless the script gave us a new one.
+            wrap_target()
+            wait(1, irq, wait_on_irq)   # clears the IRQ too
 
-        # x = pll delay, if necessary
-        # y = reset delay
-        if control_pll:
+            if control_pll:
+                mov(x, osr)
+                pull(noblock)
+                mov(y, osr)             # y = PLL delay
+            mov(x, isr)
             pull(noblock)
-            mov(x, osr)
-
-        pull(noblock)
-        mov(y, osr)
-
-        # wait for POST 0xDA
-        if use_post_bit_1:
-            wait(0, pin, 0) # 0xD8/D9
+            mov(isr, osr)
             if control_pll:
-                label("pll_delay")
-                jmp(x_dec, "pll_delay")
-                set(pins, 1)
-            wait(1, pin, 1) # 0xDA
+                mov(osr, y)             # y is also the PLL delay counter, this saves an instruction
+            else:
+                mov(y, isr)
+        elif loop_on_reset_gpio != -1:
+            # DMA keeps the FIFO topped up, so the pulls don't actually block
+            wrap_target()
+            wait(0, gpio, loop_on_reset_gpio)
+            wait(1, gpio, loop_on_reset_gpio)
+            if control_pll:
+                pull(block)
+                mov(x, osr)
+
+            pull(block)
+            mov(y, osr)
         else:
-            wait(1, pin, 0) # 0xD7
-            wait(0, pin, 0) # 0xD8
-            wait(1, pin, 0) # 0xD9
+            # x = pll delay, if necessary
+            # y = reset delay
             if control_pll:
-                label("pll_delay")
+                pull(noblock)
+                mov(x, osr)
+
+            pull(noblock)
+            mov(y, osr)
+
+        # pulse shape word stays in the OSR: low count in the top 16 bits, high count in the bottom.
+        # x is free from the start if we're not doing the PLL delay
+        if runtime_pulse_shape:
+            if loop_on_reset_gpio != -1:
+                pull(block)
+            else:
+                pull(noblock)
+            mov(isr, osr)
+            if not control_pll:
+                out(x, 16)
+
+        # wait for POST 0xD9, do the PLL delay, then wait for POST 0xDA
+        for level, index in pll_chain:
+            wait(level, pin, index)
+        if control_pll:
+            label("pll_delay")
+            if wait_on_irq != -1:
+                jmp(y_dec, "pll_delay")
+                set(pins, 1)
+                mov(y, isr)
+            else:
                 jmp(x_dec, "pll_delay")
                 set(pins, 1)
-            wait(0, pin, 0) # 0xDA
+            if runtime_pulse_shape:
+                out(x, 16)
+        for level, index in reset_chain:
+            wait(level, pin, index)
 
         # reset delay / glitch pulse
         label("reset_delay")
         jmp(y_dec, "reset_delay")
-        set(pindirs, 3) [reset_pulse_width] # /CPU_RESET already should be set to 0.
+        if runtime_pulse_shape:
+            set(pindirs, reset_bits)        # low for x + 3 cycles
+            out(y, 16)                      # y isn't free until the reset delay is done
+            label("pulse_low")
+            jmp(x_dec, "pulse_low")
+
+            set(pins, reset_bits)           # nasty voltage pulse, high for y + 2 cycles
+            label("pulse_high")
+            jmp(y_dec, "pulse_high")
+        else:
+            set(pindirs, reset_bits) [reset_pulse_width] # /CPU_RESET already should be set to 0.
 
-        set(pins, 3)                        # nasty voltage pulse - makes /CPU_RESET rise immediately
+            set(pins, reset_bits)           # nasty voltage pulse - makes /CPU_RESET rise immediately
                                             # instead of letting it float upward.
                                             # again, this is applying 3v3 to a 1v1 pin!!
 
-        set(pindirs, 0)                     # de-assert all outputs
-        if push_after_finish:
-            push(noblock)
-        
-        # spin until PIO restarted
-        wrap_target()
-        nop()
-        wrap()
+        if wait_on_irq != -1:
+            set(pindirs, reset_bits >> 1)   # de-assert /CPU_RESET
+            set(pins, 0)                    # /CPU_RESET must be low for the next attempt's pulse,
+                                            # and nobody else is going to release the PLL
+            if done_irq != -1:
+                irq(done_irq)
+            wrap()
+        elif loop_on_reset_gpio != -1:
+            set(pindirs, reset_bits >> 1)   # de-assert /CPU_RESET
+            set(pins, 0)                    # release the PLL, /CPU_RESET low for the next pulse
+            if push_after_finish or runtime_pulse_shape:
+                push(noblock)
+            if done_irq != -1:
+                irq(done_irq)
+            wrap()
+        else:
+            set(pindirs, reset_bits >> 1)   # de-assert /CPU_RESET, PLL stays asserted until Python takes it back
+            if push_after_finish or runtime_pulse_shape:
+                push(noblock)
+            if done_irq != -1:
+                irq(done_irq)
+
+            if fail_fast != FAIL_FAST_OFF:
+                # nothing else puts anything in the ISR in this mode (push cleared it),
+                # so it stays 0 until POST bit 0 comes up
+                label("watch")
+                jmp(pin, "hash_fail")       # POST bit 5 up: 0xF2
+                in_(pins, 1)
+                mov(x, isr)
+                jmp(not_x, "watch")
+                jmp("idle")                 # 0xDB, leave it alone. bit 5 goes up again at 0x20
+
+                label("hash_fail")
+                if fail_fast == FAIL_FAST_CPU_RESET:
+                    set(pins, 0)            # release the PLL too, the CPU's going down anyway
+                    set(pindirs, reset_bits)
+                else:
+                    mov(pins, invert(null))
+                set(y, 31)
+                label("hold_outer")
+                set(x, 31)              [31]
+                label("hold_inner")
+                jmp(x_dec, "hold_inner")    [31]
+                jmp(y_dec, "hold_outer")    [31]
+                if fail_fast == FAIL_FAST_CPU_RESET:
+                    set(pindirs, reset_bits >> 1)
+                else:
+                    mov(pins, null)
+                irq(fail_fast_irq)
+
+            # spin until PIO restarted
+            label("idle")
+            wrap_target()
+            nop()
+            wrap()
 
     return resetter
 
-# ---------------------------------------------------------------------------------------
+# shortest pulse the runtime pulse shape resetter can do, in statemachine cycles.
+# use the fixed pulse width resetter if you need shorter
+RUNTIME_PULSE_MIN_LOW  = 3
+RUNTIME_PULSE_MIN_HIGH = 2
 
-def _wait_post_transition(current_io_value, timeout_usec=-1) -> tuple | int:
+def pack_pulse_shape(low_cycles: int, high_cycles: int = RUNTIME_PULSE_MIN_HIGH) -> int:
     '''
-    Waits for POST transition, timeout or reset.
+    Packs a pulse shape into the word the runtime pulse shape resetter expects.
 
     Parameters:
-    timeout_usec: Optional. Timeout value in microseconds. Default is -1 (do not timeout).
+    - low_cycles: Statemachine cycles to hold /CPU_RESET low for. Minimum is RUNTIME_PULSE_MIN_LOW.
+    - high_cycles: Statemachine cycles to drive /CPU_RESET high for afterwards (the nasty voltage pulse).
+                   Minimum (and default) is RUNTIME_PULSE_MIN_HIGH. Keep this short.
+    '''
+    low  = low_cycles - RUNTIME_PULSE_MIN_LOW
+    high = high_cycles - RUNTIME_PULSE_MIN_HIGH
+    if not (0 <= low <= 0xFFFF) or not (0 <= high <= 0xFFFF):
+        raise RuntimeError(f"pulse shape out of range: low {low_cycles}, high {high_cycles}")
+    return (low << 16) | high
 
-    On success return `(new_io_value, transition_time_in_usec)`
+def unpack_pulse_shape(word: int) -> tuple:
+    '''
+    Converts a pulse shape word (or the resetter's echo of it) to `(low_cycles, high_cycles)`.
+    '''
+    return ((word >> 16) + RUNTIME_PULSE_MIN_LOW, (word & 0xFFFF) + RUNTIME_PULSE_MIN_HIGH)
 
-    If operation timed out return -1
-    If CPU unexpectedly reset return -2
+# system clock cycles per loop while the pulse verifier waits for the PLL, and for /CPU_RESET
+VERIFY_PLL_LOOP_CYCLES   = 4
+VERIFY_RESET_LOOP_CYCLES = 2
 
+def _build_pio_pulse_verifier_code(pll_chain: list, reset_chain: list, post_base: int, measure_pll: bool = True):
     '''
-    timebase = ticks_us()
+    Builds the pulse verifier: a loopback capture that follows POST along with the resetter
+    and times what actually came out on the pins. x counts down from 0xFFFFFFFF from POST 0xD9
+    onwards, and gets pushed:
+    - once CPU_PLL_BYPASS is high, after VERIFY_PLL_LOOP_CYCLES per loop (only if measure_pll)
+    - once /CPU_RESET goes low, after VERIFY_RESET_LOOP_CYCLES per loop from POST 0xDA
+    - once /CPU_RESET goes back up, same again
+    x doesn't count while waiting for 0xDA, so the difference between two words is how many
+    loops that stage took. It's one continuous count so the whole thing fits in next to a resetter.
+
+    Run it at the system clock. in_base must be CPU_PLL_BYPASS and jmp_pin must be CPU_RESET;
+    the POST waits use absolute GPIO numbers so in_base is free for that.
 
-    timeout_point = timebase + timeout_usec if timeout_usec >= 0 else -1
-    while True:
-        t = ticks_us()
-        iobits = mem32[RP2040_GPIO_IN] & POST_BITS_MASK
-        if iobits != current_io_value:
-            if iobits == POST_00:
-                return -2
-            return (iobits, t - timebase)
-        if timeout_point != -1 and t <= timeout_point:
-            return -1
+    Parameters:
+    - pll_chain, reset_chain: The same wait chains the resetter uses, see _default_wait_chains().
+    - post_base: GPIO number of POST bit 0 (POST_PIN_BASE_ID), what the chains are relative to.
+    - measure_pll: If False, the PLL isn't timed and only two words get pushed. Default is True.
+    '''
 
-def _signal_fail():
+    @rp2.asm_pio()
+    def pulse_verifier():
+        # restarting the statemachine clears the ISR, which the PLL check relies on
+        for level, index in pll_chain:
+            wait(level, gpio, post_base + index)
+        mov(x, invert(null))
+        if measure_pll:
+            label("pll_wait")
+            jmp(x_dec, "pll_sample")
+            label("pll_sample")
+            in_(pins, 1)                # CPU_PLL_BYPASS. ISR stays 0 until it's high
+            mov(y, isr)
+            jmp(not_y, "pll_wait")
+            mov(isr, x)
+            push(noblock)
+
+        for level, index in reset_chain:
+            wait(level, gpio, post_base + index)
+        label("reset_wait")
+        jmp(x_dec, "reset_check")
+        label("reset_check")
+        jmp(pin, "reset_wait")          # /CPU_RESET still high
+        mov(isr, x)
+        push(noblock)
+
+        label("reset_low")
+        jmp(pin, "released")
+        jmp(x_dec, "reset_low")
+        label("released")
+        mov(isr, x)
+        push(noblock)
+
+        # spin until PIO restarted
+        wrap_target()
+        nop()
+        wrap()
+
+    return pulse_verifier
+
+class PulseVerifier:
     '''
-    Pulse FAIL_SIGNAL pin for 1 millisecond.
+    Checks when the glitch really happened. Runs the pulse verifier next to the resetter
+    (same PIO block, off the same system clock) and reports the PLL assert time after 0xD9,
+    and the /CPU_RESET pulse start after 0xDA and width, as seen on the pins.
+    Everything's in system clock cycles, so it's 2 cycles (10.4 ns @ 192 MHz) resolution
+    for the pulse and 4 for the PLL.
     '''
-    FAIL_SIGNAL.value(1)
-    sleep_ms(1)
-    FAIL_SIGNAL.value(0)
 
-def _monitor_post_postglitch_glitch2(enable_timeouts=False) -> GlitchResult:
-    '''
-    Tracks post-glitch boot progress.
+    def __init__(self, sm_id: int = 1, measure_pll: bool = True,
+                 use_post_bit_1: bool = False, wait_chains: tuple = None):
+        '''
+        Parameters:
+        - sm_id: Statemachine to run on. Keep it in the resetter's block. Default is 1.
+        - measure_pll: Time CPU_PLL_BYPASS too. Default is True.
+        - use_post_bit_1, wait_chains: Same as whatever the resetter was built with.
+        '''
+        if wait_chains is None:
+            wait_chains = _default_wait_chains(use_post_bit_1)
+        self.measure_pll = measure_pll
+        self.last = (-1, -1, -1)
+        self.sm = rp2.StateMachine(sm_id,
+                                   _pio_program(_build_pio_pulse_verifier_code,
+                                                wait_chains[0], wait_chains[1], POST_PIN_BASE_ID, measure_pll),
+                                   freq = SYSTEM_CLOCK,
+                                   in_base=CPU_PLL_BYPASS,
+                                   jmp_pin=CPU_RESET)
+        self.sm.active(0)
+
+    def start(self):
+        '''
+        Start this at the same POST code the resetter starts at.
+        '''
+        self.last = (-1, -1, -1)
+        self.sm.active(0)
+        self.sm.restart()
+        self.sm.active(1)
+
+    def finish(self) -> tuple:
+        '''
+        Stops the verifier and returns `(pll_ns, pulse_start_ns, pulse_width_ns)`.
+        Anything that didn't happen is -1.
+        '''
+        self.sm.active(0)
+        words = [ 0xFFFFFFFF ]
+        while self.sm.rx_fifo() != 0:
+            words.append(self.sm.get())
+
+        loop_cycles = [ VERIFY_RESET_LOOP_CYCLES, VERIFY_RESET_LOOP_CYCLES ]
+        if self.measure_pll:
+            loop_cycles.insert(0, VERIFY_PLL_LOOP_CYCLES)
+
+        stages = []
+        for i, cycles in enumerate(loop_cycles):
+            if i + 1 < len(words):
+                stages.append((words[i] - words[i + 1]) * cycles * 1000000000 // SYSTEM_CLOCK)
+            else:
+                stages.append(-1)
+        if not self.measure_pll:
+            stages.insert(0, -1)
+        return tuple(stages)
+
+    def report(self) -> tuple:
+        '''
+        finish() and print the result. It's kept in `last` too.
+        '''
+        self.last = self.finish()
+        pll_ns, start_ns, width_ns = self.last
+        if self.measure_pll:
+            print(f"verify: PLL asserted {pll_ns} ns after 0xD9")
+        print(f"verify: /CPU_RESET pulse {start_ns} ns after 0xDA, {width_ns} ns wide")
+        return (pll_ns, start_ns, width_ns)
+
+# outcome codes the outcome watcher reports, in the top 4 bits of each result word
+WATCHER_OUTCOME_OK        = 1   # POST bit 0 rose, 0xDA -> 0xDB
+WATCHER_OUTCOME_HASH_FAIL = 2   # POST bit 5 rose, 0xDA -> 0xF2
+WATCHER_OUTCOME_TIMEOUT   = 3   # neither happened in time (CPU reset, froze, etc.)
+
+# statemachine cycles per loop while the outcome watcher is waiting for an outcome
+WATCHER_CYCLES_PER_LOOP = 6
+
+def _build_pio_outcome_watcher_code(reset_in_gpio: int, wait_chain: list):
     '''
-    io = mem32[RP2040_GPIO_IN] & POST_BITS_MASK
-    while True:
-        wait_result = None
-        if enable_timeouts and io in POST_TIMEOUT_TABLE:
-            wait_result = _wait_post_transition(io, timeout_usec=POST_TIMEOUT_TABLE[io])
-        else:
-            wait_result = _wait_post_transition(io)
+    Builds a program that reports how every attempt ended, one word per attempt,
+    so DMA can collect the results without Python watching each boot.
 
-        if wait_result in [ -1, -2 ]:
-            print(f"FAIL: timeout on POST {_unpack_post(io)}")
-            _signal_fail()
-            return GlitchResult.GLITCH_POSTGLITCH_TIMEOUT
+    Every time /CPU_RESET rises it follows wait_chain to POST 0xDA, then waits for
+    POST bit 0 (0xDB, success) or bit 5 (0xF2, hash check failed) to rise.
+    It pushes `outcome << 28 | y`, where outcome is one of the WATCHER_OUTCOME_* codes
+    and y is what was left of the timeout count (see _watcher_result()).
 
-        io = wait_result[0]
-        if io in [ POST_10, POST_11 ]:
-            print("SUCCESS: XeLL should be running")
-            return GlitchResult.GLITCH_OK
-        else:
-            wait_result = _wait_post_transition(io)
-            if wait_result == -1:
-                print("FAIL: SMC unexpectedly reset CPU")
-                return GlitchResult.GLITCH_SMC_TIMEOUT
-            io = wait_result[0]
+    The statemachine's in_base must be DBG_CPU_POST_OUT7 (POST bit 0), and its jmp pin POST bit 5.
+    Put the timeout, in WATCHER_CYCLES_PER_LOOP cycle loops, in the TX FIFO before starting it.
 
-def _do_glitch2_workflow(pio_sm,
-                         fcn_apply_slowdown = None,
-                         fcn_cleanup = None,
-                         wait_for_pio_resetter_done=False) -> GlitchResult:
+    Parameters:
+    - reset_in_gpio: GPIO number of CPU_RESET_IN.
+    - wait_chain: Waits from POST 0x00 to 0xDA, from posttrigger.compile_post_trigger().
     '''
-    Common workflow for 8-wire POST Glitch2-based attacks (RGH1.2, EXT_CLK).
-    PIO program will always start execution at POST 0xD6.
+    # module globals aren't visible inside the asm_pio function
+    outcome_ok        = WATCHER_OUTCOME_OK
+    outcome_hash_fail = WATCHER_OUTCOME_HASH_FAIL
+    outcome_timeout   = WATCHER_OUTCOME_TIMEOUT
 
-    Inputs:
+    @rp2.asm_pio()
+    def outcomewatcher():
+        pull(block)                     # OSR = timeout, stays there
+
+        wrap_target()
+        wait(0, gpio, reset_in_gpio)
+        wait(1, gpio, reset_in_gpio)
+        for level, index in wait_chain:
+            wait(level, pin, index)
+
+        mov(y, osr)
+        label("watch")
+        jmp(pin, "hash_fail")
+        mov(isr, null)
+        in_(pins, 1)
+        mov(x, isr)
+        jmp(x_dec, "ok")
+        jmp(y_dec, "watch")
+
+        set(x, outcome_timeout)
+        jmp("report")
+        label("ok")
+        set(x, outcome_ok)
+        jmp("report")
+        label("hash_fail")
+        set(x, outcome_hash_fail)
+
+        label("report")
+        mov(isr, null)
+        in_(x, 4)
+        in_(y, 28)
+        push(block)
+        wrap()
+
+    return outcomewatcher
+
+def _watcher_result(word: int, timeout: int) -> tuple:
+    '''
+    Unpacks an outcome watcher result into `(outcome, usec from 0xDA)`.
+    '''
+    loops = (timeout - (word & 0x0FFFFFFF)) & 0x0FFFFFFF
+    return (word >> 28, loops * WATCHER_CYCLES_PER_LOOP * 1000000 // SYSTEM_CLOCK)
+
+# transitions the transitiongetter can measure. each entry is:
+# (POST code to arm on, POST code to start PIO on, POST bit 0 levels to wait for, POST bit that rises on failure)
+TRANSITION_DA_F2 = (POST_D5, POST_D6, (1, 0, 1, 0), 5)
+'''
+0xDA -> 0xF2 (CB_B hash check failed). Used by all Glitch2/Glitch3 based attacks.
+'''
+
+TRANSITION_1D_96 = (POST_18, POST_19, (0, 1, 0, 1), 7)
+'''
+0x1D -> 0x96 (bootrom signature check failed). Used by CAboom.
+'''
+
+def _build_pio_transitiongetter_code(wait_levels: tuple):
+    '''
+    Builds transitiongetter PIO program. See pio/transitiongetter.pio for the reference implementation.
+
+    Run this at twice the resetter's frequency. Each loop iteration takes two cycles,
+    so the count it pushes is in resetter cycles and can be compared to the reset delay directly.
+
+    Parameters:
+    - wait_levels: POST bit 0 levels to wait for before counting starts. The last one
+                   should land on the POST code where the reset delay starts counting.
+    '''
+
+    @rp2.asm_pio()
+    def transitiongetter():
+        set(y, 0)                   # remember that y is 32-bit!
+        for level in wait_levels:
+            wait(level, pin, 0)
+        jmp(y_dec, "count")         # underflow y
+        label("count")
+        jmp(pin, "done")            # loop until failure POST bit goes 1
+        jmp(y_dec, "count")
+        label("done")
+        mov(isr, y)
+        push(noblock)
+
+        wrap_target()
+        nop()
+        wrap()
+
+    return transitiongetter
+
+def _transitiongetter_cycles(raw: int) -> int:
+    '''
+    Converts the transitiongetter's raw output (counts down from 0xFFFFFFFF) to a cycle count.
+    '''
+    return 0xFFFFFFFF - raw
+
+# ---------------------------------------------------------------------------------------
+
+_stage_timeout_alarm_checked = False
+
+def _check_stage_timeout_alarm():
+    '''
+    Makes sure nothing else has claimed STAGE_TIMEOUT_ALARM before it gets used for the first time.
+    Whoever claims an alarm turns its interrupt on, and we never do, so that says it's taken.
+    (it might still be armed from before a soft reset, that's just us)
+    '''
+    global _stage_timeout_alarm_checked
+    if mem32[TIMER_BASE + TIMER_INTE] & STAGE_TIMEOUT_MASK:
+        raise RuntimeError(f"TIMER alarm {STAGE_TIMEOUT_ALARM} is in use by something else, change STAGE_TIMEOUT_ALARM")
+    _stage_timeout_alarm_checked = True
+
+def _arm_stage_timeout(timeout_usec: int):
+    '''
+    Arms the stage timeout alarm. Once it goes off, `mem32[TIMER_BASE + TIMER_INTR] & STAGE_TIMEOUT_MASK`
+    reads nonzero until _cancel_stage_timeout() or the next _arm_stage_timeout().
+
+    The alarm only fires on an exact match with the timer, so anything under 2 usec is bumped
+    up to 2 to make sure the match is still in the future once the write lands.
+    '''
+    if not _stage_timeout_alarm_checked:
+        _check_stage_timeout_alarm()
+    mem32[TIMER_BASE + TIMER_ARMED] = STAGE_TIMEOUT_MASK     # write 1 to disarm
+    mem32[TIMER_BASE + TIMER_INTR]  = STAGE_TIMEOUT_MASK     # write 1 to clear
+    target = (mem32[TIMER_BASE + TIMER_TIMERAWL] + max(timeout_usec, 2)) & 0xFFFFFFFF
+    mem32[TIMER_BASE + TIMER_ALARM0 + STAGE_TIMEOUT_ALARM * 4] = target    # writing arms it
+
+def _cancel_stage_timeout():
+    mem32[TIMER_BASE + TIMER_ARMED] = STAGE_TIMEOUT_MASK
+    mem32[TIMER_BASE + TIMER_INTR]  = STAGE_TIMEOUT_MASK
+
+def _wait_post_transition(current_io_value, timeout_usec=-1) -> tuple | int:
+    '''
+    Waits for POST transition, timeout or reset.
+
+    Parameters:
+    timeout_usec: Optional. Timeout value in microseconds. Default is -1 (do not timeout).
+
+    On success return `(new_io_value, transition_time_in_usec)`
+
+    If operation timed out return -1
+    If CPU unexpectedly reset return -2
+
+    '''
+    timebase = ticks_us()
+    if timeout_usec >= 0:
+        _arm_stage_timeout(timeout_usec)
+    else:
+        _cancel_stage_timeout()
+
+    # the alarm's INTR bit can't be set unless it's armed, so that's the only check needed
+    intr = TIMER_BASE + TIMER_INTR
+    while True:
+        iobits = mem32[RP2040_GPIO_IN] & POST_BITS_MASK
+        if iobits != current_io_value:
+            t = ticks_us()
+            _cancel_stage_timeout()
+            if iobits == POST_00:
+                return -2
+            return (iobits, ticks_diff(t, timebase))
+        if mem32[intr] & STAGE_TIMEOUT_MASK:
+            _cancel_stage_timeout()
+            return -1
+
+def _wait_post_transition_quiet(current_io_value, window) -> tuple | int:
+    '''
+    _wait_post_transition() without the timeout, that also keeps track of the longest gap
+    between two reads of the POST pins in `window` (a QuietWindow).
+    '''
+    timebase = ticks_us()
+    last = timebase
+    while True:
+        iobits = mem32[RP2040_GPIO_IN] & POST_BITS_MASK
+        t = ticks_us()
+        gap = ticks_diff(t, last)
+        if gap > window.worst_gap_usec:
+            window.worst_gap_usec = gap
+        last = t
+        if iobits != current_io_value:
+            if iobits == POST_00:
+                return -2
+            return (iobits, ticks_diff(t, timebase))
+
+# what microbench/microbench.py saves its results as
+MICROBENCH_FILE = "microbench.json"
+
+def load_microbench(clock: int = -1) -> dict:
+    '''
+    Per-call costs microbench/microbench.py measured, `{ benchmark name: ns per call }`.
+    Interpreter costs go with the system clock, so if it wasn't run at `clock` the
+    nearest clock it was run at gets scaled to it. Empty if it hasn't been run at all.
+
+    Parameters:
+    - clock: System clock in Hz. Default is -1 (SYSTEM_CLOCK).
+    '''
+    if clock < 0:
+        clock = SYSTEM_CLOCK
+    try:
+        with open(MICROBENCH_FILE) as f:
+            results = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if len(results) == 0:
+        return {}
+
+    nearest = min(results.keys(), key=lambda c: abs(int(c) - clock))
+    scale = int(nearest) / clock
+    return { name: ns * scale for name, ns in results[nearest].items() }
+
+class QuietWindow:
+    '''
+    Keeps the garbage collector, and optionally interrupts (USB, REPL, timers), out of the
+    0xD6 -> 0xDB window. Pass one to the glitch workflow and it'll:
+    - gc.collect() right before it starts watching POST for 0xD6 (after the workflow's
+      own prints), then turn the GC off until the attempt's over
+    - log POST timings to a preallocated array instead of printing them as they happen,
+      and keep the workflow's progress prints out of the window until POST leaves 0xDA
+    - mask interrupts from 0xD6 until POST leaves 0xDA, if mask_irqs is set
+    - track the longest gap between two POST reads, which is the most a POST edge can have
+      been noticed late by, i.e. the attempt's jitter budget. That gap gets timed with
+      ticks_us(), so it's only good to a microsecond and includes the ticks_us() call itself.
+      If microbench.py has been run, its POST poll and ticks_us() costs at SYSTEM_CLOCK are
+      used to take the timing back out and to put a floor under the budget.
+
+    Interrupts get unmasked around the 0xD9 slowdown callback because anything that
+    sleeps would hang with them off.
+    '''
+
+    def __init__(self, mask_irqs: bool = False, max_events: int = 16):
+        '''
+        Parameters:
+        - mask_irqs: If True, mask interrupts from 0xD6 to 0xDA. USB goes quiet for that long.
+                     Default is False (GC only).
+        - max_events: POST transitions to keep per attempt. Default is 16.
+        '''
+        self.mask_irqs = mask_irqs
+        self.events = array("I", [ 0 ] * (max_events * 2))
+        self.count = 0
+        self.worst_gap_usec = 0
+        self._irq_state = None
+
+        # a bare trip round the POST wait loop, and what timing it adds on top. 0 if not benchmarked
+        bench = load_microbench()
+        self.poll_ns  = bench.get("POST poll (bytecode)", 0) + bench.get("empty loop (bytecode)", 0)
+        self.ticks_ns = bench.get("ticks_us (bytecode)", 0)
+
+    def __enter__(self):
+        self.count = 0
+        self.worst_gap_usec = 0
+        return self
+
+    def arm(self):
+        '''
+        Clears out the heap and turns the GC off. Call it last thing before watching POST,
+        nothing after it should allocate until the attempt's over.
+        '''
+        gc.collect()
+        gc.disable()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.unmask()
+        gc.enable()
+        return False
+
+    def mask(self):
+        if self.mask_irqs and self._irq_state is None:
+            self._irq_state = disable_irq()
+
+    def unmask(self):
+        if self._irq_state is not None:
+            enable_irq(self._irq_state)
+            self._irq_state = None
+
+    def log(self, post_code: int, usec: int):
+        i = self.count * 2
+        if i < len(self.events):
+            self.events[i]     = post_code
+            self.events[i + 1] = usec
+            self.count += 1
+
+    def jitter_budget_ns(self) -> int:
+        '''
+        The most a POST edge could have been noticed late by this attempt, in ns:
+        the worst gap seen minus the ticks_us() it took to see it, but never less than
+        one bare POST poll.
+        '''
+        return int(max(self.worst_gap_usec * 1000 - self.ticks_ns, self.poll_ns))
+
+    def report(self):
+        for i in range(self.count):
+            print(f"{self.events[i * 2]:02x} {self.events[i * 2 + 1]} usec")
+        if self.poll_ns == 0:
+            print(f"jitter budget: POST reads at most {self.worst_gap_usec} usec apart (run microbench.py for more)")
+        else:
+            print(f"jitter budget: {self.jitter_budget_ns()} ns (worst gap {self.worst_gap_usec} usec, "
+                  f"bare POST poll {self.poll_ns:.0f} ns)")
+
+def _signal_fail():
+    '''
+    Pulse FAIL_SIGNAL pin for 1 millisecond.
+    If the indicator's running it does the pulse and this returns straight away.
+    '''
+    if _indicator is not None:
+        _indicator.pulse(1000)
+        return
+    FAIL_SIGNAL.value(1)
+    sleep_ms(1)
+    FAIL_SIGNAL.value(0)
+
+def _record_dwell(io: int, started: int):
+    '''
+    Histograms how long POST sat on 0x54, however it ended (timeout and SMC reset included).
+    '''
+    if io == POST_54 and _histograms is not None:
+        _histograms.add("54_dwell", ticks_diff(ticks_us(), started))
+
+def _monitor_post_postglitch_glitch2(enable_timeouts=False) -> GlitchResult:
+    '''
+    Tracks post-glitch boot progress.
+    '''
+    io = mem32[RP2040_GPIO_IN] & POST_BITS_MASK
+    while True:
+        wait_result = None
+        started = ticks_us()
+        if enable_timeouts and io in POST_TIMEOUT_TABLE:
+            wait_result = _wait_post_transition(io, timeout_usec=POST_TIMEOUT_TABLE[io])
+        else:
+            wait_result = _wait_post_transition(io)
+        _record_dwell(io, started)
+
+        if wait_result in [ -1, -2 ]:
+            print(f"FAIL: timeout on POST {_unpack_post(io)}")
+            _signal_fail()
+            return GlitchResult.GLITCH_POSTGLITCH_TIMEOUT
+
+        io = wait_result[0]
+        if io in POST_XELL:
+            print("SUCCESS: XeLL should be running")
+            return GlitchResult.GLITCH_OK
+        else:
+            started = ticks_us()
+            wait_result = _wait_post_transition(io)
+            _record_dwell(io, started)
+            if wait_result == -1 or wait_result == -2:
+                print("FAIL: SMC unexpectedly reset CPU")
+                return GlitchResult.GLITCH_SMC_TIMEOUT
+            io = wait_result[0]
+
+def _do_glitch2_workflow(pio_sm,
+                         fcn_apply_slowdown = None,
+                         fcn_cleanup = None,
+                         wait_for_pio_resetter_done=False,
+                         predictor = None,
+                         recorder = None,
+                         fail_fast = False,
+                         window = None,
+                         verifier = None) -> GlitchResult:
+    '''
+    Common workflow for 8-wire POST Glitch2-based attacks (RGH1.2, EXT_CLK).
+    PIO program will always start execution at POST 0xD6.
+
+    Inputs:
     - pio_sm: The PIO statemachine, already initialized and ready to execute.
     - fcn_apply_slowdown: Optional callback executed at 0xD9. Typically where slowdown should be applied.
     - fcn_cleanup: Optional callback to execute once the glitch workflow ends.
     - wait_for_pio_resetter_done: Optional. If True, wait for PIO resetter to finish (your PIO   \
       program should push something to the ISR to indicate it's done). \
       Default is False (waits for 0xDA POST code to change to something else).
+    - predictor: Optional predictor.FailurePredictor. If it calls the attempt doomed from the
+      stage timings, the attempt is abandoned there and then.
+    - recorder: Optional predictor.TraceRecorder. Stage timings get fed to it;
+      the caller has to finish() it once the outcome is known.
+    - fail_fast: Optional. Set this if the resetter was built with fail_fast (and is on PIO0).
+      The statemachine is left running past 0xDA until it's either reset the console or let it be,
+      and a hash check failure it's taken care of doesn't get a FAIL_SIGNAL pulse on top.
+    - window: Optional QuietWindow. The attempt runs inside it, and its POST log and jitter budget
+      get printed at the end.
+    - verifier: Optional PulseVerifier. Started along with the PIO, and reports what the PLL
+      and /CPU_RESET actually did once POST leaves 0xDA.
 
     Return values:
     - GLITCH_OK: Success
     - GLITCH_SMC_TIMEOUT - Fail, SMC timeout (slowdown applied too soon, CPU froze, etc.)
     - GLITCH_SIGNATURE_CHECK_FAILED - Fail, signature check failed (reset pulse happened too late
                                     or CPU somehow failed to glitch)
+    - GLITCH_PREDICTED_FAIL - Fail, predictor gave up on the attempt early
+    - GLITCH_CPU_RESET - Fail, CPU went from 0xDA straight to 0x00 (reset pulse too early)
+    '''
+
+    if window is None:
+        result = _run_glitch2_workflow(pio_sm, fcn_apply_slowdown, fcn_cleanup, wait_for_pio_resetter_done,
+                                       predictor, recorder, fail_fast, None, verifier)
+    else:
+        with window:
+            result = _run_glitch2_workflow(pio_sm, fcn_apply_slowdown, fcn_cleanup, wait_for_pio_resetter_done,
+                                           predictor, recorder, fail_fast, window, verifier)
+        window.report()
+    if _histograms is not None:
+        _histograms.attempt_done()
+    return result
+
+def _run_glitch2_workflow(pio_sm, fcn_apply_slowdown, fcn_cleanup, wait_for_pio_resetter_done,
+                          predictor, recorder, fail_fast, window, verifier) -> GlitchResult:
+    '''
+    Does the work for _do_glitch2_workflow().
     '''
 
+    _report_armed()
     print("_do_glitch2_workflow waiting for POST 0xD6")
+    if window is not None:
+        window.arm()
     while (mem32[RP2040_GPIO_IN] & POST_BITS_MASK) != POST_D5:
         pass
 
@@ -377,56 +1785,841 @@ def _do_glitch2_workflow(pio_sm,
         pass
 
     pio_sm.active(1)
-    print("0xD6 arrived, started PIO")
+    if verifier is not None:
+        verifier.start()
+    if window is None:
+        print("0xD6 arrived, started PIO")  # the window's POST log starts at 0xD6 anyway
     io = mem32[RP2040_GPIO_IN] & POST_BITS_MASK
+    d6_d9 = 0
+    if window is not None:
+        window.mask()
     while True:
-        post_tuple = _wait_post_transition(io)
-        if post_tuple == -1:
+        if window is None:
+            post_tuple = _wait_post_transition(io)
+        else:
+            post_tuple = _wait_post_transition_quiet(io, window)
+        if post_tuple == -1 or post_tuple == -2:
+            if window is not None:
+                window.unmask()
             print("FAIL: SMC timeout")
             _signal_fail()
             return GlitchResult.GLITCH_SMC_TIMEOUT
         
         # CAUTION! these readings will be skewed by callbacks and behavior below
-        print(f"{_unpack_post(io):02x} {post_tuple[1]} usec")
+        if window is None:
+            print(f"{_unpack_post(io):02x} {post_tuple[1]} usec")
+        else:
+            window.log(_unpack_post(io), post_tuple[1])
+
+        if recorder is not None:
+            recorder.observe(_unpack_post(io), post_tuple[1])
+        if predictor is not None and predictor.observe(_unpack_post(io), post_tuple[1]):
+            if window is not None:
+                window.unmask()
+            print("FAIL: predicted from stage timings")
+            pio_sm.active(0)
+            if fcn_cleanup is not None:
+                fcn_cleanup()
+            _signal_fail()
+            return GlitchResult.GLITCH_PREDICTED_FAIL
+
+        if _histograms is not None:
+            if io == POST_D9:
+                _histograms.add("d9_da", post_tuple[1])
+            elif io == POST_D6 or io == POST_D7 or io == POST_D8:
+                d6_d9 += post_tuple[1]
+                if post_tuple[0] == POST_D9:
+                    _histograms.add("d6_d9", d6_d9)
 
         io = post_tuple[0] # raw value off IO pins, AND masked of course
 
         if io == POST_D9 and fcn_apply_slowdown is not None:
-            fcn_apply_slowdown()
+            if window is not None:
+                window.unmask()
+                fcn_apply_slowdown()
+                window.mask()
+            else:
+                fcn_apply_slowdown()
 
         elif io == POST_DA:
+            ticks_da = ticks_us()
             if wait_for_pio_resetter_done is True:
                 pio_sm.get()
             else:
                 while (mem32[RP2040_GPIO_IN] & POST_BITS_MASK) == POST_DA:
                     pass
+            post_left_da = mem32[RP2040_GPIO_IN] & POST_BITS_MASK
+            if _histograms is not None and post_left_da == POST_F2:
+                _histograms.add("da_f2", ticks_diff(ticks_us(), ticks_da))
+            if post_left_da == POST_00:
+                # the pulse reset (or crashed) the CPU before the hash check was done
+                if window is not None:
+                    window.unmask()
+                pio_sm.active(0)
+                if fcn_cleanup is not None:
+                    fcn_cleanup()
+                if verifier is not None:
+                    verifier.report()
+                print("FAIL: CPU reset out of 0xDA, pulse too early")
+                _signal_fail()
+                return GlitchResult.GLITCH_CPU_RESET
+            if fail_fast and _wait_fail_fast():
+                if window is not None:
+                    window.unmask()
+                pio_sm.active(0)
+                if fcn_cleanup is not None:
+                    fcn_cleanup()
+                print("FAIL: hash check failed, PIO reset the console")
+                return GlitchResult.GLITCH_SIGNATURE_CHECK_FAILED
             pio_sm.active(0)
             if fcn_cleanup is not None:
                 fcn_cleanup()
             break
 
     post_after = mem32[RP2040_GPIO_IN] & POST_BITS_MASK
+    if window is not None:
+        window.unmask()
+    if verifier is not None:
+        verifier.report()
 
     if post_after == POST_FB:
         print("FAIL: got POST 0xFB")
         _signal_fail()
         return GlitchResult.GLITCH_SIGNATURE_CHECK_FAILED
 
-    if post_after not in [ POST_DB, POST_20, POST_21, POST_22 ]:
+    if post_after not in POST_AFTER_GLITCH_OK:
         print("BUG CHECK: fcn_cleanup() took too long to execute")
-    
+
     return _monitor_post_postglitch_glitch2()
 
+def _wait_fail_fast(timeout_usec: int = 5000) -> bool:
+    '''
+    Once POST has left 0xDA: waits for a fail-fast resetter to say it's reset the console.
+    Gives up straight away on 0xDB/0x2x, otherwise after timeout_usec.
+
+    Returns True if the resetter dealt with it.
+    '''
+    irq_mask = 1 << FAIL_FAST_IRQ
+    _arm_stage_timeout(timeout_usec)
+    while (mem32[PIO0_BASE + PIO_IRQ] & irq_mask) == 0:
+        if (mem32[RP2040_GPIO_IN] & POST_BITS_MASK) in POST_AFTER_GLITCH_OK or \
+           (mem32[TIMER_BASE + TIMER_INTR] & STAGE_TIMEOUT_MASK):
+            _cancel_stage_timeout()
+            return False
+    _cancel_stage_timeout()
+    mem32[PIO0_BASE + PIO_IRQ] = irq_mask   # write 1 to clear
+    return True
+
+# ---------------------------------------------------------------------------------------
+
+def _force_reset():
+    '''
+    Pulse /CPU_RESET low for 1 millisecond.
+    '''
+    CPU_RESET.init(Pin.OUT, value = 0)
+    sleep(0.001)
+    CPU_RESET.init(Pin.IN)
+
+# reset ladder steps, in escalation order
+RESET_CPU_PULSE   = 0
+RESET_SMC_SOFT    = 1
+RESET_SMC_HARD    = 2
+RESET_POWER_CYCLE = 3
+RESET_STEP_NAMES  = ( "CPU pulse", "SMC soft reset", "SMC hard reset", "power cycle" )
+
+def _reset_acked() -> bool:
+    '''
+    True if the CPU is in reset, i.e. /CPU_RESET is low or the POST bits have gone to 0x00.
+    '''
+    return CPU_RESET_IN.value() == 0 or (mem32[RP2040_GPIO_IN] & POST_BITS_MASK) == POST_00
+
+def _wait_reset_ack(timeout_usec: int) -> bool:
+    _arm_stage_timeout(timeout_usec)
+    while not _reset_acked():
+        if mem32[TIMER_BASE + TIMER_INTR] & STAGE_TIMEOUT_MASK:
+            _cancel_stage_timeout()
+            return False
+    _cancel_stage_timeout()
+    return True
+
+def _wait_post(post: int, timeout_usec: int) -> bool:
+    _arm_stage_timeout(timeout_usec)
+    while (mem32[RP2040_GPIO_IN] & POST_BITS_MASK) != post:
+        if mem32[TIMER_BASE + TIMER_INTR] & STAGE_TIMEOUT_MASK:
+            _cancel_stage_timeout()
+            return False
+    _cancel_stage_timeout()
+    return True
+
+class ResetController:
+    '''
+    Gets the CPU back to a clean boot after a failed attempt, escalating from a /CPU_RESET pulse
+    to an SMC soft reset (DBG_LED, needs a hacked SMC), an SMC hard reset, and finally a power cycle.
+
+    Every step has to be acknowledged (/CPU_RESET falling or POST going to 0x00) and then get
+    to POST 0xD0 before it counts as working, otherwise the next step is tried.
+
+    It keeps track of how long each step takes to get back to 0xD0 for each failure signature
+    (whatever string you pass to recover(), e.g. the failure type and last POST code), and starts
+    the ladder at whichever step has the lowest average time per successful recovery. Steps that
+    keep failing get skipped. Stats can be saved to the board profile.
+    '''
+
+    def __init__(self,
+                 steps: tuple = None,
+                 ack_timeout_usec: int = 100000,
+                 boot_timeout_usec: int = 2000000,
+                 min_tries: int = 3):
+        '''
+        Parameters:
+        - steps: RESET_* steps to use, in order. Default is None (every step whose pins are wired).
+        - ack_timeout_usec: How long a step gets to put the CPU into reset. Default is 100 ms.
+        - boot_timeout_usec: How long the CPU then gets to reach POST 0xD0. Default is 2 seconds.
+                             Power cycles get 5 times as long.
+        - min_tries: Every step gets tried this many times per signature before the controller
+                     starts skipping steps. Default is 3.
+        '''
+        if steps is None:
+            steps = [ RESET_CPU_PULSE, RESET_SMC_SOFT ]
+            if SMC_RST_N is not None:
+                steps.append(RESET_SMC_HARD)
+                if EXT_PWR_ON_N is not None:
+                    steps.append(RESET_POWER_CYCLE)
+        self.steps             = tuple(steps)
+        self.ack_timeout_usec  = ack_timeout_usec
+        self.boot_timeout_usec = boot_timeout_usec
+        self.min_tries         = min_tries
+
+        # signature -> { step: [ tries, successes, total usec ] }
+        self.stats = BOARD_PROFILE.get("reset_ladder", {})
+
+    def recover(self, signature: str = "") -> int:
+        '''
+        Resets the CPU and waits for it to get back to POST 0xD0.
+
+        Returns the RESET_* step that worked, or -1 if none did.
+        '''
+        for step in self._ladder(signature):
+            start = ticks_us()
+            ok = self._do_step(step)
+            elapsed = ticks_diff(ticks_us(), start)
+            self._record(signature, step, ok, elapsed)
+            if ok:
+                print(f"reset: {RESET_STEP_NAMES[step]} got back to D0 in {elapsed} usec")
+                return step
+            print(f"reset: {RESET_STEP_NAMES[step]} failed, escalating")
+
+        print("reset: WARNING: CPU in coma")
+        return -1
+
+    def _ladder(self, signature: str) -> tuple:
+        '''
+        Steps to try for this signature, cheapest likely fix first, escalating from there.
+        '''
+        table = self.stats.get(signature, {})
+
+        best = -1
+        best_cost = 0
+        for i, step in enumerate(self.steps):
+            tries, successes, total_usec = table.get(str(step), (0, 0, 0))
+            if tries < self.min_tries:
+                # not enough to go on yet. start here if nothing before it works,
+                # otherwise it'll get its turn whenever the cheaper steps fail
+                if best < 0:
+                    best = i
+                break
+            if successes == 0:
+                continue
+            cost = total_usec / successes
+            if best < 0 or cost < best_cost:
+                best = i
+                best_cost = cost
+
+        if best < 0:
+            best = 0
+
+        return self.steps[best:]
+
+    def _record(self, signature: str, step: int, ok: bool, elapsed_usec: int):
+        entry = self.stats.setdefault(signature, {}).setdefault(str(step), [0, 0, 0])
+        entry[0] += 1
+        if ok:
+            entry[1] += 1
+        entry[2] += elapsed_usec
+
+    def save(self):
+        '''
+        Saves what's been learned to the board profile.
+        '''
+        BOARD_PROFILE["reset_ladder"] = self.stats
+        save_board_profile(BOARD_PROFILE)
+
+    def _do_step(self, step: int) -> bool:
+        boot_timeout_usec = self.boot_timeout_usec
+
+        if step == RESET_CPU_PULSE:
+            CPU_RESET.init(Pin.OUT, value = 0)
+            acked = _wait_reset_ack(self.ack_timeout_usec)
+            sleep_ms(1)
+            CPU_RESET.init(Pin.IN)
+
+        elif step == RESET_SMC_SOFT:
+            # same as rgh12_4wire: keep poking DBG_LED until the SMC takes the hint
+            # if the indicator's running, the pin belongs to its statemachine and
+            # FAIL_SIGNAL.value() does nothing, so it has to do the pulses
+            acked = False
+            if _indicator is None:
+                FAIL_SIGNAL.init(Pin.OUT, value = 0)    # a fail-fast resetter might've had it
+            for _ in range(9):
+                if _indicator is not None:
+                    _indicator.pulse(25000)
+                    sleep(0.025)
+                else:
+                    FAIL_SIGNAL.value(1)
+                    sleep(0.025)
+                    FAIL_SIGNAL.value(0)
+                if _wait_reset_ack(25000):
+                    acked = True
+                    break
+
+        elif step == RESET_SMC_HARD:
+            # resetting the SMC also hard resets everything
+            SMC_RST_N.init(Pin.OUT, value = 0)
+            sleep(0.005)
+            SMC_RST_N.init(Pin.IN)
+            acked = _wait_reset_ack(self.ack_timeout_usec)
+
+        elif step == RESET_POWER_CYCLE:
+            SMC_RST_N.init(Pin.OUT, value = 0)
+            sleep(0.005)
+            SMC_RST_N.init(Pin.IN)
+
+            # this pin is debounced, so leave it low until the system actually powers back on
+            EXT_PWR_ON_N.init(Pin.OUT, value = 0)
+            boot_timeout_usec *= 5
+            ok = _wait_post(POST_D0, boot_timeout_usec)
+            EXT_PWR_ON_N.init(Pin.IN)
+            return ok
+
+        else:
+            raise RuntimeError(f"unknown reset step {step}")
+
+        return acked and _wait_post(POST_D0, boot_timeout_usec)
+
+def _do_transition_calibration(sm_freq: int,
+                               transition: tuple = TRANSITION_DA_F2,
+                               fcn_apply_slowdown = None,
+                               fcn_cleanup = None,
+                               slowdown_post: int = POST_D9) -> int:
+    '''
+    Runs the transitiongetter for one boot instead of a glitch attempt and
+    measures how long the failure transition takes.
+
+    The glitch attempt this replaces is guaranteed to fail, so the CPU is reset
+    once the measurement is in.
+
+    Parameters:
+    - sm_freq: Resetter statemachine frequency. The transitiongetter runs at twice this.
+    - transition: One of the TRANSITION_* tuples. Default is 0xDA -> 0xF2.
+    - fcn_apply_slowdown: Optional callback executed at `slowdown_post`, same as in a real
+                          glitch attempt, so the measured timing matches the slowed down CPU.
+    - fcn_cleanup: Optional callback executed once the measurement finishes.
+    - slowdown_post: POST code to run fcn_apply_slowdown at. Default is 0xD9.
+
+    Returns the transition time in resetter cycles, or -1 if the CPU reset before
+    the transition happened.
+
+    The transitiongetter goes in PIO0 and takes 11 slots; it's removed again afterwards.
+    If the caller's got its own programs loaded in there, it might have to make room first.
+    '''
+    arm_post, start_post, wait_levels, fail_bit = transition
+
+    prg = _pio_program(_build_pio_transitiongetter_code, wait_levels)
+    sm = rp2.StateMachine(0,
+                          prg,
+                          freq = sm_freq * 2,
+                          in_base=DBG_CPU_POST_OUT7,
+                          jmp_pin=Pin(POST_PIN_BASE_ID + fail_bit))
+    sm.active(0)
+    sm.restart()
+
+    print("calibration waiting for start POST")
+    while (mem32[RP2040_GPIO_IN] & POST_BITS_MASK) != arm_post:
+        pass
+    while (mem32[RP2040_GPIO_IN] & POST_BITS_MASK) != start_post:
+        pass
+
+    sm.active(1)
+    if fcn_apply_slowdown is not None:
+        while (mem32[RP2040_GPIO_IN] & POST_BITS_MASK) != slowdown_post:
+            pass
+        fcn_apply_slowdown()
+
+    cycles = -1
+    while True:
+        if sm.rx_fifo() != 0:
+            cycles = _transitiongetter_cycles(sm.get())
+            break
+        if (mem32[RP2040_GPIO_IN] & POST_BITS_MASK) == POST_00:
+            break
+
+    sm.active(0)
+    # re-initing a statemachine doesn't free its old program, and PIO0 is tight enough already
+    rp2.PIO(0).remove_program(prg)
+    if fcn_cleanup is not None:
+        fcn_cleanup()
+    _force_reset()
+
+    if cycles == -1:
+        print("calibration FAIL: CPU reset before transition")
+    else:
+        print(f"calibration: transition after {cycles} cycles")
+        if _histograms is not None:
+            _histograms.add("1d_96" if transition == TRANSITION_1D_96 else "da_f2", cycles * 1000000 // sm_freq)
+    return cycles
+
+def calibrate_post_skew(boots: int = 10, stable_samples: int = 64, last_post: int = 0xDA) -> list:
+    '''
+    Measures how far each POST bit lags behind the others on this board's wiring and saves
+    it in the board profile, so the settled sampler/match trigger only wait as long as they have to.
+
+    Resets the CPU `boots` times and captures every POST code change up to `last_post`.
+
+    Parameters:
+    - boots: Number of boots to capture. Default is 10.
+    - stable_samples: Codes held at least this many samples count as real POST codes,
+                      anything shorter is an intermediate caused by skew. Default is 64.
+    - last_post: POST code to stop capturing at. Default is 0xDA.
+
+    Returns the skew table in nanoseconds (see postskew.analyze_skew()).
+    '''
+    from postskew import analyze_skew, worst_skew
+
+    freq(SYSTEM_CLOCK)
+
+    prg = _pio_program(_build_pio_post_capture_code)
+    ns_per_sample = POST_CAPTURE_CYCLES_PER_SAMPLE * 1e9 / SYSTEM_CLOCK
+
+    events = []
+    dropped = 0
+    for boot in range(boots):
+        sm = rp2.StateMachine(0, prg, freq = SYSTEM_CLOCK, in_base=DBG_CPU_POST_OUT7)
+        sm.active(1)
+        _force_reset()
+
+        # each change is (new code, how long the previous one was held). the very first pair's
+        # count means nothing. codes fit in 8 bits and counts never do, so if a noblock push
+        # got dropped, whatever pair it was in gets thrown away and we pick up from the next one
+        code    = -1    # code that's up now, -1 if we're out of step
+        pending = -1    # code waiting on its count word
+        while True:
+            word = sm.get()
+            if word <= 0xFF:
+                if pending >= 0:
+                    # count went missing, so nobody knows how long `code` was held
+                    code = -1
+                    dropped += 1
+                pending = word
+                continue
+
+            if pending < 0:
+                # code went missing, so `code` isn't the one that's up anymore
+                code = -1
+                dropped += 1
+                continue
+
+            if code >= 0:
+                events.append((code, 0xFFFFFFFF - word + 1))
+            code = pending
+            pending = -1
+            if code == last_post:
+                break
+
+        sm.active(0)
+        events.append((code, stable_samples))   # it's the last one, doesn't matter how long it stayed
+        print(f"skew calibration: boot {boot + 1}/{boots} captured")
+
+    if dropped != 0:
+        print(f"WARNING: capture FIFO overflowed {dropped} times, those transitions were skipped")
+
+    skew = analyze_skew(events, stable_samples)
+    skew_ns = [ [ int(rise * ns_per_sample + 0.5), int(fall * ns_per_sample + 0.5) ] for rise, fall in skew ]
+
+    BOARD_PROFILE["post_skew_ns"] = skew_ns
+    BOARD_PROFILE["post_settle_ns"] = int(worst_skew(skew) * ns_per_sample + 0.5)
+    save_board_profile(BOARD_PROFILE)
+
+    for bit in range(8):
+        print(f"POST bit {bit}: rise {skew_ns[bit][0]} ns, fall {skew_ns[bit][1]} ns")
+    print(f"settle time: {BOARD_PROFILE['post_settle_ns']} ns")
+    return skew_ns
+
+class DriftTracker:
+    '''
+    Keeps the reset delay centred on the measured failure transition
+    (0xDA -> 0xF2, or 0x1D -> 0x96 for CAboom) as the console's timing wanders.
+
+    The first calibration learns how far the reset delay sits from the transition.
+    Every calibration after that moves the reset delay so that distance stays the same.
+
+    Calibration is due every `calibrate_every` attempts, or when fewer than
+    `min_hits` out of the last `window` attempts booted.
+    '''
+
+    def __init__(self,
+                 reset_delay: int,
+                 calibrate_every: int = 50,
+                 window: int = 20,
+                 min_hits: int = 1,
+                 max_jump: int = 5000):
+        '''
+        Parameters:
+        - reset_delay: Known-good (or starting) reset delay, in resetter cycles.
+        - calibrate_every: Calibrate after this many glitch attempts. 0 disables this.
+        - window: Number of recent attempts the hit rate is taken over.
+        - min_hits: Calibrate when the last `window` attempts booted fewer than this many times.
+                    0 disables this.
+        - max_jump: Measurements further than this from the last one (in cycles) are thrown out.
+                    The transitiongetter is easily confused by a flaky POST bit.
+        '''
+        self.reset_delay     = reset_delay
+        self.calibrate_every = calibrate_every
+        self.window          = window
+        self.min_hits        = min_hits
+        self.max_jump        = max_jump
+
+        self.offset          = None  # reset delay minus transition time, learned on first calibration
+        self.last_transition = None
+
+        self._outcomes       = bytearray(window)
+        self._outcome_index  = 0
+        self._outcome_count  = 0
+        self._hits           = 0
+        self._since_calibration = 0
+
+    def calibration_due(self) -> bool:
+        '''
+        Returns True if the next boot should be spent running the transitiongetter.
+        '''
+        if self.offset is None:
+            return True
+        if self.calibrate_every > 0 and self._since_calibration >= self.calibrate_every:
+            return True
+        if self.min_hits > 0 and self._outcome_count >= self.window and self._hits < self.min_hits:
+            return True
+        return False
+
+    def record(self, success: bool):
+        '''
+        Records the outcome of one glitch attempt.
+        '''
+        i = self._outcome_index
+        self._hits -= self._outcomes[i]
+        self._outcomes[i] = 1 if success else 0
+        self._hits += self._outcomes[i]
+        self._outcome_index = (i + 1) % self.window
+        if self._outcome_count < self.window:
+            self._outcome_count += 1
+        self._since_calibration += 1
+
+    def calibrate(self, transition_cycles: int) -> int:
+        '''
+        Feeds a transitiongetter measurement in and recentres the reset delay on it.
+
+        Returns the new reset delay.
+        '''
+        if transition_cycles < 0:
+            return self.reset_delay
+
+        if self.last_transition is not None and \
+           abs(transition_cycles - self.last_transition) > self.max_jump:
+            print(f"drift: ignoring bogus transition {transition_cycles} (last was {self.last_transition})")
+            return self.reset_delay
+
+        if self.offset is None:
+            self.offset = self.reset_delay - transition_cycles
+        else:
+            old = self.reset_delay
+            self.reset_delay = transition_cycles + self.offset
+            if self.reset_delay != old:
+                print(f"drift: reset delay {old} -> {self.reset_delay}")
+
+        self.last_transition = transition_cycles
+
+        # start the hit rate over, otherwise a bad streak retriggers calibration immediately
+        self._outcomes = bytearray(self.window)
+        self._outcome_index = 0
+        self._outcome_count = 0
+        self._hits = 0
+        self._since_calibration = 0
+        return self.reset_delay
+
+    def hit_rate(self) -> float:
+        '''
+        Hit rate over the last `window` attempts.
+        '''
+        if self._outcome_count == 0:
+            return 0.0
+        return self._hits / self._outcome_count
+
 
 # ---------------------------------------------------------------------------------------
 
-def rgh12():
+def _set_sm_clkdiv(sm_id: int, div_int: int, div_frac: int):
+    '''
+    Sets a statemachine's clock divider directly, fractional part and all.
+    `StateMachine(freq=...)` goes through a float division, so this is the only way
+    to be sure the divider is exactly what a DelayPlan asked for.
+    '''
+    base = PIO0_BASE if sm_id < 4 else PIO1_BASE
+    sm = sm_id & 3
+    mem32[base + PIO_SM0_CLKDIV + sm * PIO_SM_REG_STRIDE] = (div_int << 16) | (div_frac << 8)
+
+    # CLKDIV_RESTART so the new divider starts from a clean phase
+    mem32[base + RP2040_ATOMIC_SET + PIO_CTRL] = 1 << (8 + sm)
+
+def _init_sm_for_plan(sm_id: int, prg, plan: "DelayPlan", **kwargs):
+    '''
+    Creates a statemachine running at the clock a DelayPlan asked for.
+    Switches the system clock if the plan needs a different one.
+
+    Any extra keyword arguments go to `rp2.StateMachine`.
+    '''
+    if freq() != plan.sys_freq:
+        freq(plan.sys_freq)
+    sm = rp2.StateMachine(sm_id, prg, freq = int(plan.sm_freq()), **kwargs)
+    _set_sm_clkdiv(sm_id, plan.div_int, plan.div_frac)
+    return sm
+
+# ---------------------------------------------------------------------------------------
+# clock profiles
+
+VREG_AND_CHIP_RESET_BASE = 0x40064000
+VREG_MV_TO_VSEL = { 1100: 0b1011, 1150: 0b1100, 1200: 0b1101 }
+DEFAULT_CORE_MV = 1100
+
+CLOCK_SELFTEST_MAX_ERROR_PPM = 2000     # ~200 usec over the 100 ms count, which is mostly Python overhead
+CLOCK_SELFTEST_FILE          = "clocktest.bin"
+
+def _set_core_voltage(mv: int):
+    '''
+    Sets the core regulator. Raise it before raising the clock, lower it after lowering the clock.
+    '''
+    mem32[VREG_AND_CHIP_RESET_BASE] = (VREG_MV_TO_VSEL[mv] << 4) | 1    # VSEL, EN
+    sleep_ms(1)     # let it settle
+
+def _build_pio_cycle_counter_code():
+    '''
+    Burns `x + 1` cycles for whatever x gets put in, then pushes. 3 cycles of overhead on top.
+    '''
+    @rp2.asm_pio()
+    def cycle_counter():
+        pull(block)
+        mov(x, osr)
+        label("count")
+        jmp(x_dec, "count")
+        push(block)
+
+    return cycle_counter
+
+def _selftest_pio_clock(clock: int) -> int:
+    '''
+    Times 100 ms worth of statemachine cycles against the 1 MHz timer. Returns the error in ppm.
+
+    The timer and the PLL both run off the same crystal, so this says nothing about how accurate
+    the delays are in absolute terms. All it catches is the statemachines not running at the clock
+    that was asked for (PLL not locking where it should, the CPU choking at this clock).
+    Checking real timing takes an outside reference, e.g. bench_trigger() or a DriftTracker.
+    '''
+    sm = rp2.StateMachine(4, _pio_program(_build_pio_cycle_counter_code), freq = clock)
+    sm.active(1)
+    cycles = clock // 10
+    start = ticks_us()
+    sm.put(cycles - 4)
+    sm.get()
+    elapsed = ticks_diff(ticks_us(), start)
+    sm.active(0)
+    return (elapsed - 100000) * 1000000 // 100000
+
+def _selftest_flash() -> bool:
+    '''
+    Writes a file, reads it back and checks it survived. Flash runs off the system clock,
+    so this is the first thing to go when the clock's too fast for it.
+    '''
+    pattern = bytes((i * 37 + 11) & 0xFF for i in range(4096))
+    try:
+        with open(CLOCK_SELFTEST_FILE, "wb") as f:
+            f.write(pattern)
+        with open(CLOCK_SELFTEST_FILE, "rb") as f:
+            ok = f.read() == pattern
+        os.remove(CLOCK_SELFTEST_FILE)
+        return ok
+    except OSError:
+        return False
+
+def _selftest_usb(lines: int = 50, max_usec: int = 500000) -> bool:
+    '''
+    Pushes a burst of lines down the USB serial port. USB runs off its own PLL, but the
+    interrupt handling doesn't, so a shaky clock shows up as stalls here (or the port dropping).
+    '''
+    start = ticks_us()
+    for i in range(lines):
+        print(f"usb selftest {i:02d} ................................................")
+    return ticks_diff(ticks_us(), start) < max_usec
+
+def clock_selftest(clock: int) -> bool:
+    '''
+    Runs the self tests at whatever the clock's set to right now.
+    '''
+    error_ppm = _selftest_pio_clock(clock)
+    flash_ok  = _selftest_flash()
+    usb_ok    = _selftest_usb()
+    pio_ok    = abs(error_ppm) <= CLOCK_SELFTEST_MAX_ERROR_PPM
+    print(f"{clock // 1000000} MHz: PIO clock {error_ppm:+d} ppm ({'ok' if pio_ok else 'FAIL'}), " \
+          f"flash {'ok' if flash_ok else 'FAIL'}, usb {'ok' if usb_ok else 'FAIL'}")
+    return pio_ok and flash_ok and usb_ok
+
+def validate_clock_profiles(profiles: tuple = None) -> list:
+    '''
+    Tries every clock profile, self-tests it, and saves the ones that pass to the board profile.
+    Goes back to DEFAULT_SYSTEM_CLOCK afterwards. Run this with the console off.
+
+    Parameters:
+    - profiles: `(system clock, core millivolts)` tuples. Default is None (timing.CLOCK_PROFILES).
+
+    Returns the profiles that passed.
+    '''
+    if profiles is None:
+        from timing import CLOCK_PROFILES
+        profiles = CLOCK_PROFILES
+
+    passed = []
+    try:
+        for clock, mv in profiles:
+            print(f"trying {clock // 1000000} MHz at {mv} mV")
+            _set_core_voltage(mv)
+            try:
+                freq(clock)
+            except ValueError:
+                print(f"{clock // 1000000} MHz: PLL can't do it")
+                continue
+            if clock_selftest(clock):
+                passed.append([ clock, mv ])
+    finally:
+        freq(DEFAULT_SYSTEM_CLOCK)
+        _set_core_voltage(DEFAULT_CORE_MV)
+
+    BOARD_PROFILE["clock_profiles"] = passed
+    save_board_profile(BOARD_PROFILE)
+    return passed
+
+def validated_clocks() -> tuple:
+    '''
+    System clocks that are safe to use: the stock timing.SYSTEM_CLOCKS plus anything that's
+    passed validate_clock_profiles(). Fastest first; pass it to timing.plan_delay() as sys_freqs.
+    '''
+    from timing import SYSTEM_CLOCKS
+
+    clocks = set(SYSTEM_CLOCKS)
+    for clock, mv in BOARD_PROFILE.get("clock_profiles", []):
+        clocks.add(clock)
+    return tuple(sorted(clocks, reverse=True))
+
+def use_clock_profile(clock: int):
+    '''
+    Switches SYSTEM_CLOCK (and the core voltage) to a validated profile. Everything that does
+    `freq(SYSTEM_CLOCK)` picks it up from then on. Loop counts planned for the old clock need
+    converting, see timing.convert_delay_table().
+    '''
+    from timing import SYSTEM_CLOCKS
+
+    global SYSTEM_CLOCK
+
+    mv = DEFAULT_CORE_MV
+    if clock not in SYSTEM_CLOCKS:
+        for profile_clock, profile_mv in BOARD_PROFILE.get("clock_profiles", []):
+            if profile_clock == clock:
+                mv = profile_mv
+                break
+        else:
+            raise RuntimeError(f"{clock // 1000000} MHz hasn't passed validate_clock_profiles()")
+
+    if mv > DEFAULT_CORE_MV:
+        _set_core_voltage(mv)
+    freq(clock)
+    if mv == DEFAULT_CORE_MV:
+        _set_core_voltage(mv)
+    SYSTEM_CLOCK = clock
+
+    if clock % 48000000 != 0:
+        print(f"WARNING: {clock // 1000000} MHz can't run 48 MHz statemachines off an integer divider, " \
+              "plan delays with timing.plan_delay() instead")
+
+# statemachine clocks rgh12() will let a reset_delay_ns plan pick. the pulse width is tuned for 48 MHz
+RGH12_SM_FREQ_RANGE = (42000000, 48000000)
+
+def rgh12(track_drift: bool = False, reset_delay_ns: float = None, dither: bool = False,
+          reset_controller: ResetController = None,
+          predictor: "FailurePredictor" = None,
+          recorder: "TraceRecorder" = None,
+          fail_fast: int = FAIL_FAST_OFF,
+          window: QuietWindow = None,
+          verify_pulse: bool = False):
     '''
     RGH 1.2, 8-wire POST
+
+    Parameters:
+    - track_drift: If True, periodically spend a boot measuring the 0xDA -> 0xF2 transition
+                   and keep the reset delay centred on it. Default is False.
+    - reset_delay_ns: Optional. Reset delay in nanoseconds (7287.9375 usec = 7287937.5).
+                      timing.plan_delay() picks the system clock (out of validated_clocks())
+                      and statemachine divider that get closest, and both get applied; the
+                      statemachine stays inside RGH12_SM_FREQ_RANGE.
+                      Default is None (use the hardcoded cycle count, converted with
+                      timing.plan_for_clock() if use_clock_profile() moved SYSTEM_CLOCK).
+    - dither: If True, alternate between the loop counts either side of reset_delay_ns
+              so the average hits it exactly. Default is False.
+    - reset_controller: Optional. If given, failed attempts are recovered with its reset ladder
+                        instead of just trusting the SMC to reset the CPU. Default is None.
+    - predictor: Optional. Abandons attempts early if their stage timings say they're doomed,
+                 see load_failure_predictor(). Default is None.
+    - recorder: Optional. Records stage timings and outcomes to train a predictor with. Default is None.
+    - fail_fast: FAIL_FAST_CPU_RESET or FAIL_FAST_DBG_LED to have the resetter reset the console
+                 itself the moment the hash check fails, instead of waiting on Python.
+                 Use FAIL_FAST_DBG_LED with "Reset Me" SMC images. Default is FAIL_FAST_OFF.
+    - window: Optional QuietWindow to run every attempt in. Default is None.
+    - verify_pulse: If True, a PulseVerifier times the PLL and reset pulse on the pins every attempt,
+                    and the recorder (if any) logs those instead of trusting the cycle counts.
+                    Doesn't fit in PIO0 alongside fail_fast. With track_drift, the verifier (20)
+                    shares PIO0 with the resetter (11) or the transitiongetter (11), never both.
+                    Default is False.
     '''
 
     pll_wait_ms = 0.4
     reset_delay = 349818 # 349821 is the recommended RGH 1.2 delay value
+    sm_freq     = 48000000
+
+    plan = None
+    if reset_delay_ns is not None or SYSTEM_CLOCK != DEFAULT_SYSTEM_CLOCK:
+        from timing import DelayDither, plan_delay, plan_for_clock, RESETTER_OVERHEAD_CYCLES
+    if reset_delay_ns is not None:
+        # the pulse width is in statemachine cycles too, so keep the statemachine near 48 MHz
+        plan = plan_delay(reset_delay_ns, validated_clocks(), max_div = 5, sm_freq_range = RGH12_SM_FREQ_RANGE)
+        if plan.sys_freq != SYSTEM_CLOCK:
+            use_clock_profile(plan.sys_freq)
+        sm_freq = int(plan.sm_freq())
+    elif SYSTEM_CLOCK != DEFAULT_SYSTEM_CLOCK:
+        # the hardcoded delay is 48 MHz cycles off DEFAULT_SYSTEM_CLOCK. carry the same time over
+        # to this clock with the divider that gets closest to 48 MHz, and say what that comes to
+        div = (SYSTEM_CLOCK * 256 + sm_freq // 2) // sm_freq
+        plan = plan_for_clock((reset_delay + RESETTER_OVERHEAD_CYCLES) * 1e9 / sm_freq,
+                              SYSTEM_CLOCK, div >> 8, div & 0xFF)
+        sm_freq = int(plan.sm_freq())
+    freq(SYSTEM_CLOCK)
+    ditherer = DelayDither(plan) if plan is not None and dither else None
+    if plan is not None:
+        print(f"planned reset delay: {plan}")
+        reset_delay = plan.cycles if ditherer is None else ditherer.low_cycles
 
     def _apply_slowdown():
         sleep(pll_wait_ms)
@@ -434,17 +2627,1039 @@ def rgh12():
         
     def _cleanup():
         CPU_PLL_BYPASS.value(0)
+        if fail_fast == FAIL_FAST_DBG_LED:
+            FAIL_SIGNAL.init(Pin.OUT, value = 0)
+
+    tracker = DriftTracker(reset_delay) if track_drift else None
+
+    if fail_fast == FAIL_FAST_DBG_LED:
+        # the resetter needs FAIL_SIGNAL for itself
+        stop_indicator()
+    if verify_pulse and fail_fast != FAIL_FAST_OFF:
+        raise RuntimeError("verify_pulse and fail_fast don't fit in one PIO block together")
+    # only pass fail_fast when it's on, so the plain resetter matches what precompile_pio_programs() saved
+    resetter_kwargs = { "fail_fast": fail_fast } if fail_fast != FAIL_FAST_OFF else {}
+    prg = _pio_program(_build_pio_glitch2_resetter_code, 4, **resetter_kwargs)
+    verifier = PulseVerifier(sm_id = 1) if verify_pulse else None
+    fail_fast_kwargs = {}
+    if fail_fast != FAIL_FAST_OFF:
+        fail_fast_kwargs["jmp_pin"] = Pin(POST_PIN_BASE_ID + 5)
+        if fail_fast == FAIL_FAST_DBG_LED:
+            fail_fast_kwargs["out_base"] = FAIL_SIGNAL
 
     while True:
-        prg = _build_pio_glitch2_resetter_code(4)
+        if tracker is not None:
+            if tracker.calibration_due():
+                # neither the fail-fast resetter (24) + transitiongetter (11) nor the verifier (20)
+                # + resetter (11) + transitiongetter (11) fit in PIO0, so the resetter comes out
+                # and gets loaded again by the next attempt's StateMachine()
+                rp2.PIO(0).remove_program(prg)
+                tracker.calibrate(_do_transition_calibration(sm_freq, TRANSITION_DA_F2, _apply_slowdown, _cleanup))
+                continue
+            reset_delay = tracker.reset_delay
+
+        attempt_delay = reset_delay
+        if ditherer is not None:
+            attempt_delay += ditherer.next_cycles() - ditherer.low_cycles
+        if plan is not None:
+            print(f"reset delay {attempt_delay} cycles = {plan.cycles_to_ns(attempt_delay):.3f} ns")
+
+        if plan is not None:
+            # exact divider, fractional part and all
+            sm = _init_sm_for_plan(0, prg, plan,
+                                   in_base=DBG_CPU_POST_OUT7,
+                                   set_base=CPU_RESET,
+                                   **fail_fast_kwargs)
+        else:
+            sm = rp2.StateMachine(0,
+                                  prg,
+                                  freq = sm_freq,
+                                  in_base=DBG_CPU_POST_OUT7,
+                                  set_base=CPU_RESET,
+                                  **fail_fast_kwargs
+                                  )
+        sm.active(0)
+        sm.restart()
+        sm.put(attempt_delay)
+        mem32[PIO0_BASE + PIO_IRQ] = 1 << FAIL_FAST_IRQ
+
+        result = _do_glitch2_workflow(sm, _apply_slowdown, _cleanup, predictor=predictor, recorder=recorder,
+                                      fail_fast=fail_fast != FAIL_FAST_OFF, window=window, verifier=verifier)
+        if tracker is not None:
+            tracker.record(result == GlitchResult.GLITCH_OK)
+
+        # predicted failures would teach the predictor to agree with itself
+        if recorder is not None:
+            if result == GlitchResult.GLITCH_PREDICTED_FAIL:
+                recorder.stages = {}
+            else:
+                if verifier is not None:
+                    pll_ns, start_ns, width_ns = verifier.last
+                    recorder.stages["pll_ns"]   = pll_ns
+                    recorder.stages["pulse_ns"] = start_ns
+                    recorder.stages["width_ns"] = width_ns
+                recorder.finish(result == GlitchResult.GLITCH_OK)
+
+        if reset_controller is not None and result != GlitchResult.GLITCH_OK:
+            post = _unpack_post(mem32[RP2040_GPIO_IN])
+            reset_controller.recover(f"{result.value}:{post:02x}")
+
+def rgh12_compare(reset_delays: list, alpha: float = 0.05, max_rounds: int = -1) -> int:
+    '''
+    RGH 1.2, 8-wire POST, comparing reset delays against each other instead of glitching for real.
+
+    Attempts cycle through the delays one at a time and stop as soon as one boots
+    significantly more often than the rest (see glitchsearch.Comparison).
+
+    Parameters:
+    - reset_delays: Reset delays to compare, in cycles at 48 MHz, e.g. `[ 349818, 349819 ]`.
+    - alpha: Chance of picking a delay that isn't actually better. Default is 0.05.
+    - max_rounds: Give up after this many rounds. Default is -1 (keep going until there's a winner).
+
+    Returns the winning delay, or -1 if max_rounds ran out first.
+    '''
+    pll_wait_ms = 0.4
+    sm_freq     = 48000000
+
+    freq(SYSTEM_CLOCK)
+
+    def _apply_slowdown():
+        sleep(pll_wait_ms)
+        CPU_PLL_BYPASS.value(1)
+
+    def _cleanup():
+        CPU_PLL_BYPASS.value(0)
+
+    from glitchsearch import Comparison
+
+    comparison = Comparison(reset_delays, alpha)
+    prg = _pio_program(_build_pio_glitch2_resetter_code, 4)
+
+    while comparison.winner() < 0 and comparison.rounds != max_rounds:
+        index, reset_delay = comparison.next_config()
+        print(f"round {comparison.rounds + 1}: reset delay {reset_delay}")
+
         sm = rp2.StateMachine(0,
                               prg,
-                              freq = 48000000,
+                              freq = sm_freq,
+                              in_base=DBG_CPU_POST_OUT7,
+                              set_base=CPU_RESET
+                              )
+        sm.active(0)
+        sm.restart()
+        sm.put(reset_delay)
+
+        result = _do_glitch2_workflow(sm, _apply_slowdown, _cleanup)
+        comparison.record(index, result == GlitchResult.GLITCH_OK)
+
+        # a successful boot has to be reset to get on with the next attempt
+        if result == GlitchResult.GLITCH_OK:
+            _force_reset()
+
+    comparison.report()
+    winner = comparison.winner()
+    return reset_delays[winner] if winner >= 0 else -1
+
+def _search_outcome(result: GlitchResult) -> int:
+    '''
+    Maps a glitch workflow result to a glitchsearch outcome.
+    '''
+    from glitchsearch import OUTCOME_OK, OUTCOME_LATE, OUTCOME_EARLY, OUTCOME_OTHER
+
+    if result == GlitchResult.GLITCH_OK:
+        return OUTCOME_OK
+    if result == GlitchResult.GLITCH_SIGNATURE_CHECK_FAILED:
+        return OUTCOME_LATE
+    if result == GlitchResult.GLITCH_CPU_RESET:
+        return OUTCOME_EARLY
+    return OUTCOME_OTHER
+
+def glitch2_search(search: "GlitchSearch", attempts: int = -1, high_cycles: int = RUNTIME_PULSE_MIN_HIGH,
+                   window: QuietWindow = None):
+    '''
+    8-wire POST Glitch2 attack where every attempt runs at whatever point
+    the search engine wants to try next. The PIO controls CPU_PLL_BYPASS so the PLL delay
+    can be searched too.
+
+    The resetter is only assembled once; the pulse width goes through the FIFO every attempt.
+
+    Parameters:
+    - search: A glitchsearch.GlitchSearch. Build it with the PLL delays, reset delays, pulse widths
+              and statemachine clocks you want to try. Pulse widths are the number of
+              cycles /CPU_RESET is held low for, minimum RUNTIME_PULSE_MIN_LOW.
+    - attempts: Number of attempts to run. Default is -1 (run forever).
+    - high_cycles: Number of cycles /CPU_RESET is driven high for after the pulse.
+                   Default is RUNTIME_PULSE_MIN_HIGH.
+    - window: Optional QuietWindow to run every attempt in. No slowdown callback here,
+              so it's safe to mask interrupts. Default is None.
+
+    Returns the best point found.
+    '''
+    freq(SYSTEM_CLOCK)
+
+    prg = _pio_program(_build_pio_glitch2_resetter_code, 0, control_pll=True, runtime_pulse_shape=True)
+
+    def _cleanup():
+        # take the PLL pin back from the PIO
+        CPU_PLL_BYPASS.init(Pin.OUT, value = 0)
+
+    while attempts != 0:
+        point = search.next_point()
+        print(f"trying {point}")
+
+        sm = rp2.StateMachine(0,
+                              prg,
+                              freq = point.sm_freq,
                               in_base=DBG_CPU_POST_OUT7,
                               set_base=CPU_PLL_BYPASS
                               )
         sm.active(0)
         sm.restart()
+        sm.put(point.pll_delay)
+        sm.put(point.reset_delay)
+        sm.put(pack_pulse_shape(point.pulse_width, high_cycles))
+
+        result = _do_glitch2_workflow(sm, None, _cleanup, window=window)
+        if sm.rx_fifo() != 0:
+            low, high = unpack_pulse_shape(sm.get())    # echo of what we put, not a measurement
+            print(f"pulse sent: low {low} cycles, high {high} cycles")
+        search.record(point, _search_outcome(result))
+
+        if attempts > 0:
+            attempts -= 1
+
+    search.report()
+    return search.best()
+
+# what core 1 sends back in glitch2_dualcore(): (CORE1_EVENT_POST, post code, usec held)
+# for every POST code, then (CORE1_EVENT_DONE, GlitchResult value, 0) once the attempt's over
+CORE1_EVENT_POST = 0
+CORE1_EVENT_DONE = 1
+
+CORE1_RUNNING  = 0
+CORE1_STOP     = 1
+CORE1_STOPPED  = 2
+
+def _core1_glitch2(sm, prg, commands: "SpscRing", events: "SpscRing", state: array):
+    '''
+    Core 1 side of glitch2_dualcore(). Takes `(pll_delay, reset_delay, pulse_shape)` commands,
+    runs the attempt and reports back through `events`. Nothing in here prints or allocates
+    (init() doesn't either, once the program's loaded), so core 0's GC and USB traffic
+    can't get in the way.
+    '''
+    command = array("I", [ 0, 0, 0 ])
+    intr = TIMER_BASE + TIMER_INTR
+
+    while state[0] == CORE1_RUNNING:
+        if not commands.get(command):
+            continue
+
+        # the PLL pin got handed back to the SIO last time, and only init() gives it back to the PIO
+        sm.active(0)
+        sm.init(prg, freq = state[1], in_base=DBG_CPU_POST_OUT7, set_base=CPU_PLL_BYPASS)
+        sm.put(command[0])
+        sm.put(command[1])
+        sm.put(command[2])
+
+        while (mem32[RP2040_GPIO_IN] & POST_BITS_MASK) != POST_D5:
+            if state[0] != CORE1_RUNNING:
+                break
+        while (mem32[RP2040_GPIO_IN] & POST_BITS_MASK) != POST_D6:
+            if state[0] != CORE1_RUNNING:
+                break
+        if state[0] != CORE1_RUNNING:
+            break
+
+        sm.active(1)
+        io = POST_D6
+        armed = False
+        glitched = False
+        result = GlitchResult.GLITCH_POSTGLITCH_TIMEOUT.value
+        timebase = ticks_us()
+        while state[0] == CORE1_RUNNING:
+            iobits = mem32[RP2040_GPIO_IN] & POST_BITS_MASK
+            if iobits == io:
+                if armed and (mem32[intr] & STAGE_TIMEOUT_MASK):
+                    _signal_fail()
+                    break
+                continue
+
+            t = ticks_us()
+            if armed:
+                _cancel_stage_timeout()
+                armed = False
+            events.put(CORE1_EVENT_POST, _unpack_post(io), ticks_diff(t, timebase))
+            timebase = t
+
+            if io == POST_DA and not glitched:
+                # release the PLL as soon as the pulse is done, same as the single core workflow
+                sm.active(0)
+                CPU_PLL_BYPASS.init(Pin.OUT, value = 0)
+                glitched = True
+                if iobits == POST_FB or iobits == POST_F2:
+                    result = GlitchResult.GLITCH_SIGNATURE_CHECK_FAILED.value
+                    _signal_fail()
+                    break
+                if iobits == POST_00:
+                    result = GlitchResult.GLITCH_CPU_RESET.value
+                    _signal_fail()
+                    break
+
+            io = iobits
+            if io == POST_00:
+                result = GlitchResult.GLITCH_SMC_TIMEOUT.value
+                break
+            if glitched and (io == POST_10 or io == POST_11):
+                result = GlitchResult.GLITCH_OK.value
+                break
+            if glitched and io in POST_TIMEOUT_TABLE:
+                _arm_stage_timeout(POST_TIMEOUT_TABLE[io])
+                armed = True
+
+        if armed:
+            _cancel_stage_timeout()
+        sm.active(0)
+        CPU_PLL_BYPASS.init(Pin.OUT, value = 0)
+        events.put(CORE1_EVENT_DONE, result, 0)
+
+    state[0] = CORE1_STOPPED
+
+def glitch2_dualcore(search: "GlitchSearch", attempts: int = -1, high_cycles: int = RUNTIME_PULSE_MIN_HIGH):
+    '''
+    glitch2_search(), split across both cores. Core 1 does nothing but watch POST and run the
+    resetter; core 0 picks points, prints and does the bookkeeping. They talk through
+    two preallocated SpscRings, so neither one ever waits on the other.
+
+    Post-glitch stages get the POST_TIMEOUT_TABLE timeouts.
+
+    Parameters:
+    - search: A GlitchSearch, see glitch2_search().
+    - attempts: Number of attempts to run. Default is -1 (run forever).
+    - high_cycles: Number of cycles /CPU_RESET is driven high for after the pulse.
+                   Default is RUNTIME_PULSE_MIN_HIGH.
+
+    Returns the best point found.
+    '''
+    freq(SYSTEM_CLOCK)
+
+    prg = _pio_program(_build_pio_glitch2_resetter_code, 0, control_pll=True, runtime_pulse_shape=True)
+    sm = rp2.StateMachine(0,
+                          prg,
+                          freq = 48000000,
+                          in_base=DBG_CPU_POST_OUT7,
+                          set_base=CPU_PLL_BYPASS
+                          )
+    sm.active(0)
+
+    from spscring import SpscRing
+    from glitchsearch import OUTCOME_OK, OUTCOME_LATE, OUTCOME_EARLY, OUTCOME_OTHER
+
+    commands = SpscRing(2)      # one attempt in flight, so core 0 can change the clock in between
+    events   = SpscRing(64)
+    state    = array("I", [ CORE1_RUNNING, 48000000 ])   # core 1 state, statemachine clock
+    record   = array("I", [ 0, 0, 0 ])
+    dropped  = 0
+    _check_stage_timeout_alarm()    # here, not on core 1 where nobody would see it
+    _thread.start_new_thread(_core1_glitch2, (sm, prg, commands, events, state))
+
+    try:
+        while attempts != 0:
+            point = search.next_point()
+            print(f"trying {point}")
+
+            # core 1 re-inits the statemachine with this. the command going in publishes it
+            state[1] = point.sm_freq
+            commands.put(point.pll_delay, point.reset_delay, pack_pulse_shape(point.pulse_width, high_cycles))
+
+            while True:
+                if not events.get(record):
+                    continue
+                if record[0] == CORE1_EVENT_POST:
+                    print(f"{record[1]:02x} {record[2]} usec")
+                    continue
+                break
+
+            result = record[1]
+            if result == GlitchResult.GLITCH_OK.value:
+                print("SUCCESS: XeLL should be running")
+                search.record(point, OUTCOME_OK)
+            elif result == GlitchResult.GLITCH_SIGNATURE_CHECK_FAILED.value:
+                print("FAIL: hash check failed")
+                search.record(point, OUTCOME_LATE)
+            elif result == GlitchResult.GLITCH_CPU_RESET.value:
+                print("FAIL: CPU reset out of 0xDA, pulse too early")
+                search.record(point, OUTCOME_EARLY)
+            else:
+                print(f"FAIL: result {result}")
+                search.record(point, OUTCOME_OTHER)
+
+            if events.dropped != dropped:
+                print(f"WARNING: {events.dropped - dropped} POST events dropped")
+                dropped = events.dropped
+
+            if attempts > 0:
+                attempts -= 1
+    finally:
+        state[0] = CORE1_STOP
+        while state[0] != CORE1_STOPPED:
+            pass
+        sm.active(0)
+        CPU_PLL_BYPASS.init(Pin.OUT, value = 0)
+
+    search.report()
+    return search.best()
+
+def glitch2_1wire(reset_delay: int,
+                  pll_delay: int = -1,
+                  use_post_bit_1: bool = False,
+                  reset_pulse_width: int = 3,
+                  sm_freq: int = 48000000,
+                  reset_step: int = 0):
+    '''
+    Single-wire POST Glitch2 attack.
+
+    One statemachine counts POST toggles from /CPU_RESET rise up to 0xD6 and raises an IRQ,
+    which releases the resetter statemachine. Both run in PIO0 and loop on their own,
+    so every attempt gets the same cycle-exact trigger as 8-wire mode with no ARM involvement.
+    Python just waits for the resetter to report in.
+
+    Only one POST bit (plus CPU_RESET_IN) needs to be wired, on the same GPIO it'd be on
+    for 8-wire mode. The two programs take up to 31 of the 32 instruction slots in PIO0 between them
+    (POST bit 1 with the PLL controlled), so don't count on anything else fitting next to them.
+
+    Parameters:
+    - reset_delay: Reset delay in statemachine cycles.
+    - pll_delay: PLL delay in statemachine cycles. Default is -1 (don't control CPU_PLL_BYPASS).
+    - use_post_bit_1: If True, POST bit 1 is wired instead of bit 0. Default is False.
+    - reset_pulse_width: Number of additional cycles to assert /CPU_RESET for. Default is 3.
+    - sm_freq: Resetter statemachine frequency. Default is 48 MHz.
+    - reset_step: Added to the reset delay after every attempt. Default is 0 (don't change it).
+    '''
+    freq(SYSTEM_CLOCK)
+
+    control_pll = pll_delay >= 0
+
+    # see the table in _build_pio_glitch2_posttracker_program()
+    tracker_prg = _pio_program(_build_pio_glitch2_posttracker_program, 11 if use_post_bit_1 else 20, POSTTRACKER_IRQ, CPU_RESET_IN_ID)
+    resetter_prg = _pio_program(_build_pio_glitch2_resetter_code, reset_pulse_width,
+                                control_pll=control_pll,
+                                use_post_bit_1=use_post_bit_1,
+                                wait_on_irq=POSTTRACKER_IRQ,
+                                done_irq=RESETTER_DONE_IRQ)
+
+    tracker = rp2.StateMachine(0,
+                               tracker_prg,
+                               freq = SYSTEM_CLOCK,
+                               in_base=DBG_CPU_POST_OUT6 if use_post_bit_1 else DBG_CPU_POST_OUT7,
+                               jmp_pin=CPU_RESET_IN)
+    resetter = rp2.StateMachine(1,
+                                resetter_prg,
+                                freq = sm_freq,
+                                in_base=DBG_CPU_POST_OUT7,
+                                set_base=CPU_PLL_BYPASS if control_pll else CPU_RESET)
+
+    tracker.active(0)
+    resetter.active(0)
+    tracker.restart()
+    resetter.restart()
+
+    if control_pll:
+        resetter.put(pll_delay)
+    resetter.put(reset_delay)
+
+    # resetter first, so it's already waiting when the IRQ comes
+    resetter.active(1)
+    tracker.active(1)
+    _report_armed()
+    print("single-wire tracker armed")
+
+    done_mask = 1 << RESETTER_DONE_IRQ
+    mem32[PIO0_BASE + PIO_IRQ] = done_mask
+
+    attempts = 0
+    try:
+        while True:
+            while (mem32[PIO0_BASE + PIO_IRQ] & done_mask) == 0:
+                pass
+            mem32[PIO0_BASE + PIO_IRQ] = done_mask  # write 1 to clear
+            attempts += 1
+            print(f"attempt {attempts}: reset pulse sent, reset delay {reset_delay}")
+
+            if reset_step != 0:
+                reset_delay += reset_step
+                if control_pll:
+                    resetter.put(pll_delay)
+                resetter.put(reset_delay)
+    finally:
+        tracker.active(0)
+        resetter.active(0)
+
+def glitch2_wired(wiring: dict,
+                  reset_delay: int,
+                  pll_delay: int = -1,
+                  reset_pulse_width: int = 3,
+                  sm_freq: int = 48000000):
+    '''
+    Glitch2 attack for any subset of POST bits.
+
+    The whole wait from /CPU_RESET release to POST 0xDA is compiled into the resetter
+    (see posttrigger.py), so there's no Python in the loop until the pulse is done.
+    Python arms the statemachine while the CPU is held in reset and waits for it to report in.
+
+    Parameters:
+    - wiring: Maps POST bit number -> GPIO number for every POST bit that's wired,
+              e.g. `{ 0: 15, 1: 16, 7: 22 }` for 3-wire on the pico.
+              None means all 8 bits on their usual pins.
+    - reset_delay: Reset delay in statemachine cycles.
+    - pll_delay: PLL delay in statemachine cycles. Default is -1 (don't control CPU_PLL_BYPASS).
+    - reset_pulse_width: Number of additional cycles to assert /CPU_RESET for. Default is 3.
+    - sm_freq: Resetter statemachine frequency. Default is 48 MHz.
+
+    Raises RuntimeError if the wiring can't find POST 0xDA on its own, or the wait chain won't fit
+    in one PIO block. Single-wire bit 0 is too long; use glitch2_1wire() for that.
+    '''
+    from posttrigger import GLITCH2_POST_SEQUENCE, post_subsequence, compile_post_trigger, describe_chain
+
+    if wiring is None:
+        wiring = { bit: POST_PIN_BASE_ID + bit for bit in range(8) }
+
+    in_base = min(wiring.values())
+
+    # POST bit 1 on its own can't see 0xD9, so the PLL delay starts at 0xD8 like use_post_bit_1 does
+    pll_point = 0xD9
+    try:
+        pll_chain = compile_post_trigger(post_subsequence(GLITCH2_POST_SEQUENCE, 0x00, pll_point), wiring, in_base)
+    except RuntimeError:
+        pll_point = 0xD8
+        pll_chain = compile_post_trigger(post_subsequence(GLITCH2_POST_SEQUENCE, 0x00, pll_point), wiring, in_base)
+
+    reset_chain = compile_post_trigger(post_subsequence(GLITCH2_POST_SEQUENCE, pll_point, 0xDA), wiring, in_base)
+
+    # the rest of the resetter is 13 instructions at most
+    if len(pll_chain) + len(reset_chain) > 32 - 13:
+        raise RuntimeError(f"wait chain needs {len(pll_chain) + len(reset_chain)} waits, only room for {32 - 13}")
+    print(f"to 0x{pll_point:02x}: {describe_chain(pll_chain, in_base)}")
+    print(f"to 0xDA: {describe_chain(reset_chain, in_base)}")
+
+    freq(SYSTEM_CLOCK)
+
+    control_pll = pll_delay >= 0
+    prg = _pio_program(_build_pio_glitch2_resetter_code, reset_pulse_width,
+                       push_after_finish=True,
+                       control_pll=control_pll,
+                       wait_chains=(pll_chain, reset_chain))
+
+    attempts = 0
+    while True:
+        # the chain starts at POST 0x00, so arm while the CPU is still in reset
+        while CPU_RESET_IN.value() != 0:
+            pass
+
+        sm = rp2.StateMachine(0,
+                              prg,
+                              freq = sm_freq,
+                              in_base=Pin(in_base),
+                              set_base=CPU_PLL_BYPASS if control_pll else CPU_RESET)
+        sm.active(0)
+        sm.restart()
+        if control_pll:
+            sm.put(pll_delay)
         sm.put(reset_delay)
+        sm.active(1)
+
+        sm.get()
+        sm.active(0)
+        if control_pll:
+            CPU_PLL_BYPASS.init(Pin.OUT, value = 0)
+
+        attempts += 1
+        print(f"attempt {attempts}: reset pulse sent")
+
+def glitch2_match(reset_delay: int,
+                  pll_delay: int = -1,
+                  stable_samples: int = -1,
+                  reset_pulse_width: int = 3,
+                  sm_freq: int = 48000000,
+                  trigger_code: int = -1,
+                  monitor: bool = False):
+    '''
+    8-wire Glitch2 attack with an exact POST code match trigger.
 
-        _do_glitch2_workflow(sm, _apply_slowdown, _cleanup)
+    Works like glitch2_1wire(), except the trigger statemachine watches all 8 POST bits
+    and fires on an exact match (see _build_pio_post_match_trigger()), so glitchy edges
+    don't throw the trigger off by a stage.
+
+    Parameters:
+    - reset_delay: Reset delay in statemachine cycles.
+    - pll_delay: PLL delay in statemachine cycles. Default is -1 (don't control CPU_PLL_BYPASS).
+    - stable_samples: Number of matching samples in a row before the trigger fires.
+                      Only 1 fits in a PIO block alongside the resetter if the PLL is being controlled.
+                      Default is -1 (enough to cover the calibrated settle time, see calibrate_post_skew()).
+    - reset_pulse_width: Number of additional cycles to assert /CPU_RESET for. Default is 3.
+    - sm_freq: Resetter statemachine frequency. Default is 48 MHz.
+    - trigger_code: POST code to trigger on. Default is -1 (0xD9 if controlling the PLL, otherwise 0xDA).
+                    Whatever it is, the reset delay starts counting from it if the PLL isn't being
+                    controlled, or from the next bit 0 fall after the PLL delay if it is.
+    - monitor: If True, a debounced POST capture runs in the other PIO block at the same time
+               and the codes get printed between attempts. Default is False.
+    '''
+    freq(SYSTEM_CLOCK)
+
+    control_pll = pll_delay >= 0
+    if stable_samples < 0:
+        stable_samples = 1 if control_pll else \
+            min(32, (post_settle_cycles(SYSTEM_CLOCK) + POST_MATCH_CYCLES_PER_SAMPLE - 1) // POST_MATCH_CYCLES_PER_SAMPLE + 1)
+
+    if control_pll and stable_samples > 1:
+        raise RuntimeError("stable_samples > 1 and PLL control won't both fit in one PIO block")
+
+    if trigger_code < 0:
+        trigger_code = 0xD9 if control_pll else 0xDA
+
+    trigger_prg  = _pio_program(_build_pio_post_match_trigger, stable_samples, POSTTRACKER_IRQ)
+    resetter_prg = _pio_program(_build_pio_glitch2_resetter_code, reset_pulse_width,
+                                control_pll=control_pll,
+                                wait_on_irq=POSTTRACKER_IRQ,
+                                done_irq=RESETTER_DONE_IRQ,
+                                wait_chains=([], [ (0, 0) ] if control_pll else []))
+
+    entries = [
+        ("trigger", trigger_prg, "glitch", { "freq": SYSTEM_CLOCK, "in_base": DBG_CPU_POST_OUT7 }),
+        ("resetter", resetter_prg, "glitch", { "freq": sm_freq,
+                                               "in_base": DBG_CPU_POST_OUT7,
+                                               "set_base": CPU_PLL_BYPASS if control_pll else CPU_RESET }),
+    ]
+    if monitor:
+        capture_samples = post_stable_samples()
+        entries.append(("capture", _pio_program(_build_pio_debounced_post_capture_code, capture_samples), "capture",
+                        { "freq": SYSTEM_CLOCK, "in_base": DBG_CPU_POST_OUT7 }))
+
+    statemachines, sm_ids = load_pio_plan(entries)
+    trigger  = statemachines["trigger"]
+    resetter = statemachines["resetter"]
+    capture  = None
+    if monitor:
+        capture = DebouncedPostCapture(stable_samples=capture_samples, sm=statemachines["capture"])
+
+    trigger.restart()
+    resetter.restart()
+
+    trigger.put(trigger_code)
+    if control_pll:
+        resetter.put(pll_delay)
+    resetter.put(reset_delay)
+
+    resetter.active(1)
+    trigger.active(1)
+    if capture is not None:
+        capture.start()
+    _report_armed()
+    print(f"match trigger armed on POST 0x{trigger_code:02x}")
+
+    irq_reg = (PIO1_BASE if sm_ids["resetter"] >= 4 else PIO0_BASE) + PIO_IRQ
+    done_mask = 1 << RESETTER_DONE_IRQ
+    mem32[irq_reg] = done_mask
+
+    attempts = 0
+    try:
+        while True:
+            while (mem32[irq_reg] & done_mask) == 0:
+                if capture is not None:
+                    code = capture.poll()
+                    if code != -1:
+                        print(f"{code:02x}")
+            mem32[irq_reg] = done_mask
+            attempts += 1
+            print(f"attempt {attempts}: reset pulse sent")
+    finally:
+        trigger.active(0)
+        resetter.active(0)
+        if capture is not None:
+            capture.stop()
+
+def monitor_post_debounced(stable_samples: int = -1):
+    '''
+    Prints debounced POST codes as they come in, along with how many in-between codes got
+    thrown away. Good for checking the POST wiring; a clean setup rejects next to nothing.
+
+    Parameters:
+    - stable_samples: Samples a code has to hold for. Default is -1 (use post_stable_samples()).
+    '''
+    freq(SYSTEM_CLOCK)
+
+    capture = DebouncedPostCapture(stable_samples=stable_samples)
+    print(f"debounced POST capture, {capture.stable_samples} samples " \
+          f"({capture.stable_samples * POST_DEBOUNCE_CYCLES_PER_SAMPLE * 1000000000 // SYSTEM_CLOCK} ns)")
+    capture.start()
+    try:
+        while True:
+            code = capture.poll()
+            if code != -1:
+                print(f"{code:02x} (rejected {capture.rejected}, {capture.reject_rate():.3f} per code)")
+    finally:
+        capture.stop()
+
+def glitch2_scheduled(schedule: list, batch: int = 16, high_cycles: int = RUNTIME_PULSE_MIN_HIGH,
+                      timeout_usec: int = 50000, search: "GlitchSearch" = None,
+                      idle_timeout_ms: int = 30000) -> list:
+    '''
+    8-wire Glitch2 attack that runs a whole schedule of attempts without Python in the loop.
+
+    DMA feeds `(pll_delay, reset_delay, pulse_shape)` words to a resetter that re-arms itself
+    on every /CPU_RESET rise, and another DMA channel collects one result word per attempt
+    from the outcome watcher (see _build_pio_outcome_watcher_code()). Python just picks
+    up the results in batches, so attempts go as fast as the console can reboot.
+
+    Parameters:
+    - schedule: `(pll_delay, reset_delay, pulse_low_cycles)` tuples, delays in 48 MHz cycles.
+                e.g. `[ (point.pll_delay, point.reset_delay, point.pulse_width) ... ]`.
+                pulse_low_cycles must be at least RUNTIME_PULSE_MIN_LOW.
+    - batch: Results to wait for before handling them. Default is 16.
+    - high_cycles: Number of cycles /CPU_RESET is driven high for after the pulse.
+                   Default is RUNTIME_PULSE_MIN_HIGH.
+    - timeout_usec: How long after 0xDA to wait for 0xDB/0xF2 before calling it a timeout.
+                    Default is 50 ms.
+    - search: Optional. If given, results are recorded against the GlitchSearch point with the
+              same delays and pulse width. Default is None.
+    - idle_timeout_ms: Give up if no result has come in for this long, e.g. the console's
+                       powered off or stuck somewhere the SMC doesn't reset it from. Default is 30 s.
+
+    Stops at the first successful boot, since the console won't come back around for the next
+    attempt once it's running XeLL.
+
+    Returns a list of `(outcome, usec from 0xDA)` tuples, one per attempt that ran, in schedule order.
+    '''
+    from posttrigger import GLITCH2_POST_SEQUENCE, post_subsequence, compile_post_trigger
+
+    sm_freq = 48000000
+    freq(SYSTEM_CLOCK)
+
+    wiring = { bit: POST_PIN_BASE_ID + bit for bit in range(8) }
+    pll_chain   = compile_post_trigger(post_subsequence(GLITCH2_POST_SEQUENCE, 0x00, 0xD9), wiring, POST_PIN_BASE_ID)
+    reset_chain = compile_post_trigger(post_subsequence(GLITCH2_POST_SEQUENCE, 0xD9, 0xDA), wiring, POST_PIN_BASE_ID)
+
+    words = array("I")
+    for pll_delay, reset_delay, pulse_low in schedule:
+        words.append(pll_delay)
+        words.append(reset_delay)
+        words.append(pack_pulse_shape(pulse_low, high_cycles))
+    results = array("I", [ 0 ] * len(schedule))
+
+    resetter_prg = _pio_program(_build_pio_glitch2_resetter_code, 0,
+                                control_pll=True,
+                                runtime_pulse_shape=True,
+                                wait_chains=(pll_chain, reset_chain),
+                                loop_on_reset_gpio=CPU_RESET_IN_ID)
+    watcher_prg  = _pio_program(_build_pio_outcome_watcher_code, CPU_RESET_IN_ID, pll_chain + reset_chain)
+
+    statemachines, sm_ids = load_pio_plan([
+        ("resetter", resetter_prg, "resetter", { "freq": sm_freq,
+                                                 "in_base": DBG_CPU_POST_OUT7,
+                                                 "set_base": CPU_PLL_BYPASS }),
+        ("watcher", watcher_prg, "watcher", { "freq": SYSTEM_CLOCK,
+                                              "in_base": DBG_CPU_POST_OUT7,
+                                              "jmp_pin": Pin(POST_PIN_BASE_ID + 5) }),
+    ])
+    resetter = statemachines["resetter"]
+    watcher  = statemachines["watcher"]
+
+    timeout = min(0x0FFFFFFF, timeout_usec * (SYSTEM_CLOCK // 1000000) // WATCHER_CYCLES_PER_LOOP)
+    watcher.put(timeout)
+
+    feed  = rp2.DMA()
+    drain = rp2.DMA()
+    try:
+        feed.config(read=words, write=resetter, count=len(words),
+                    ctrl=feed.pack_ctrl(size=2, inc_read=True, inc_write=False,
+                                        treq_sel=_pio_dreq(sm_ids["resetter"], DREQ_PIO0_TX0)))
+        drain.config(read=watcher, write=results, count=len(results),
+                     ctrl=drain.pack_ctrl(size=2, inc_read=False, inc_write=True,
+                                          treq_sel=_pio_dreq(sm_ids["watcher"], DREQ_PIO0_RX0)))
+        drain.active(1)
+        feed.active(1)
+        watcher.active(1)
+        resetter.active(1)
+        _report_armed()
+        print(f"schedule of {len(schedule)} attempts armed")
+
+        outcomes = []
+        last_done = 0
+        last_progress = ticks_ms()
+        succeeded = False
+        while len(outcomes) < len(schedule) and not succeeded:
+            done = len(schedule) - drain.count
+            if done != last_done:
+                last_done = done
+                last_progress = ticks_ms()
+            idle = ticks_diff(ticks_ms(), last_progress) >= idle_timeout_ms
+            # a success has to be picked up straight away, nothing comes in after it
+            waiting = done - len(outcomes)
+            if waiting < batch and done != len(schedule) and not idle and \
+               (waiting == 0 or (results[done - 1] >> 28) != WATCHER_OUTCOME_OK):
+                sleep_ms(10)
+                continue
+
+            hits = 0
+            for i in range(len(outcomes), done):
+                outcome, usec = _watcher_result(results[i], timeout)
+                outcomes.append((outcome, usec))
+                if outcome == WATCHER_OUTCOME_OK:
+                    hits += 1
+                    succeeded = True
+                    print(f"SUCCESS: {schedule[i]} ({usec} usec after 0xDA)")
+                if search is not None:
+                    _record_scheduled(search, schedule[i], outcome)
+            print(f"{done}/{len(schedule)} attempts, {hits} hits in this batch")
+
+            if idle and not succeeded and len(outcomes) < len(schedule):
+                print(f"FAIL: no results for {idle_timeout_ms} ms, giving up")
+                break
+    finally:
+        resetter.active(0)
+        watcher.active(0)
+        feed.close()
+        drain.close()
+        CPU_PLL_BYPASS.init(Pin.OUT, value = 0)
+
+    return outcomes
+
+def _record_scheduled(search: "GlitchSearch", entry: tuple, outcome: int):
+    '''
+    Feeds a scheduled attempt's outcome back to the GlitchSearch point it came from.
+    '''
+    from glitchsearch import OUTCOME_OK, OUTCOME_LATE, OUTCOME_OTHER
+
+    pll_delay, reset_delay, pulse_width = entry
+    for point in search.points:
+        if point.pll_delay == pll_delay and point.reset_delay == reset_delay and point.pulse_width == pulse_width:
+            if outcome == WATCHER_OUTCOME_OK:
+                search.record(point, OUTCOME_OK)
+            elif outcome == WATCHER_OUTCOME_HASH_FAIL:
+                search.record(point, OUTCOME_LATE)
+            else:
+                search.record(point, OUTCOME_OTHER)
+            return
+
+# ---------------------------------------------------------------------------------------
+#
+# Bench mode. A PIO statemachine plays a POST/CPU_RESET waveform (see postwave.py) out of
+# BENCH_OUT_BASE_ID..+8, and those get jumpered to the POST inputs (bit n -> POST_PIN_BASE_ID + n)
+# and CPU_RESET_IN. Everything else runs exactly like it would on a console, so trigger timing
+# can be tested without one. NEVER have a console hooked up while this is running.
+#
+# The waveform doesn't care what the resetter does, it just plays the same boot over and over.
+#
+# /CPU_RESET (CPU_RESET) isn't connected to anything on the bench, and the resetter only ever
+# drives it low, so start_bench() turns its pull-up on to stand in for the console's. That's what
+# the PulseVerifier sees the pulse on. Leave the pin unconnected (or hang a scope off it).
+#
+# ---------------------------------------------------------------------------------------
+
+BENCH_FREQ        = 1000000 # player clock, 1 usec per cycle
+BENCH_PLAYER_SM_ID = 4      # PIO1, away from the resetter and verifier on PIO0
+
+def _build_pio_waveform_player_code():
+    '''
+    Builds the waveform player: every word (see postwave.encode_waveform()) puts its low
+    WAVEFORM_PIN_BITS bits on the out pins and holds them for the rest of the word
+    + WAVEFORM_OVERHEAD_CYCLES cycles. out_base must be BENCH_OUT_BASE_ID.
+    '''
+    from postwave import WAVEFORM_PIN_BITS
+
+    pin_bits   = WAVEFORM_PIN_BITS
+    count_bits = 32 - WAVEFORM_PIN_BITS
+
+    # everything starts out low, so the "console" is held in reset until the first word
+    @rp2.asm_pio(out_init=(PIO.OUT_LOW,) * WAVEFORM_PIN_BITS, out_shiftdir=PIO.SHIFT_RIGHT,
+                 autopull=True, pull_thresh=32)
+    def waveform_player():
+        wrap_target()
+        out(pins, pin_bits)
+        out(y, count_bits)
+        label("hold")
+        jmp(y_dec, "hold")
+        wrap()
+
+    return waveform_player
+
+class WaveformPlayer:
+    '''
+    Plays a waveform out of the bench pins, fed by DMA so nothing on the ARM side
+    (including whatever's being tested) can hold it up.
+    Use start_bench() rather than making one of these yourself.
+    '''
+
+    def __init__(self, waveform: list, loop: bool = True, sm_id: int = BENCH_PLAYER_SM_ID):
+        '''
+        Parameters:
+        - waveform: `(post_code, reset_high, hold_usec)` list, see postwave.py.
+        - loop: If True, a second DMA channel restarts the first one every time it runs out,
+                so the waveform repeats until stop(). Default is True.
+        - sm_id: Statemachine to run on. Default is BENCH_PLAYER_SM_ID.
+        '''
+        from postwave import encode_waveform, waveform_usec
+
+        if BENCH_OUT_BASE_ID < 0:
+            raise RuntimeError(f"no bench pins on {BOARD}")
+        self.words   = encode_waveform(waveform, BENCH_FREQ)
+        self.loop    = loop
+        self.sm_id   = sm_id
+        self.usec    = waveform_usec(waveform)
+        self.sm      = rp2.StateMachine(sm_id, _pio_program(_build_pio_waveform_player_code),
+                                        freq = BENCH_FREQ,
+                                        out_base=Pin(BENCH_OUT_BASE_ID))
+        self.sm.active(0)
+        self.feed    = None
+        self.rewind  = None
+        self.rewind_addr = array("I", [ addressof(self.words) ])
+
+    def start(self):
+        self.stop()
+        self.sm.restart()
+
+        self.feed = rp2.DMA()
+        chain_kwargs = {}
+        if self.loop:
+            self.rewind = rp2.DMA()
+            chain_kwargs["chain_to"] = self.rewind.channel
+            # writing the read address with the trigger alias reloads the count and starts it over
+            self.rewind.config(read=self.rewind_addr,
+                               write=DMA_BASE + self.feed.channel * DMA_CH_STRIDE + DMA_CH_AL3_READ_ADDR_TRIG,
+                               count=1,
+                               ctrl=self.rewind.pack_ctrl(size=2, inc_read=False, inc_write=False))
+        self.feed.config(read=self.words, write=self.sm, count=len(self.words),
+                         ctrl=self.feed.pack_ctrl(size=2, inc_read=True, inc_write=False,
+                                                  treq_sel=_pio_dreq(self.sm_id, DREQ_PIO0_TX0),
+                                                  **chain_kwargs),
+                         trigger=True)
+        self.sm.active(1)
+
+    def stop(self):
+        '''
+        Stops playing and lets go of the bench pins.
+        '''
+        self.sm.active(0)
+        # rewind channel first so it can't kick the feed off again
+        if self.rewind is not None:
+            self.rewind.close()
+            self.rewind = None
+        if self.feed is not None:
+            self.feed.close()
+            self.feed = None
+        from postwave import WAVEFORM_PIN_BITS
+
+        for i in range(WAVEFORM_PIN_BITS):
+            Pin(BENCH_OUT_BASE_ID + i, Pin.IN)
+
+_bench_player = None
+
+def start_bench(waveform: list = None):
+    '''
+    Starts playing a waveform into the POST inputs on repeat. Any attack script can be run
+    against it from then on, e.g. `rgh12(verify_pulse=True)`.
+    Also pulls /CPU_RESET up, so the pulse on it reads the same as on a console.
+
+    Parameters:
+    - waveform: Optional waveform from postwave.py. Default is None (postwave.glitch2_waveform()).
+    '''
+    global _bench_player
+    stop_bench()
+    freq(SYSTEM_CLOCK)
+    if waveform is None:
+        from postwave import glitch2_waveform
+        waveform = glitch2_waveform()
+    # nobody else holds it high on the bench. stays set when a StateMachine takes the pin
+    CPU_RESET.init(Pin.IN, Pin.PULL_UP)
+    _bench_player = WaveformPlayer(waveform)
+    _bench_player.start()
+    print(f"bench: playing {len(waveform)} segment waveform every {_bench_player.usec} usec")
+
+def stop_bench():
+    '''
+    Stops the waveform and takes the pull-up off /CPU_RESET again.
+    '''
+    global _bench_player
+    if _bench_player is not None:
+        _bench_player.stop()
+        _bench_player = None
+        CPU_RESET.init(Pin.IN)
+
+def _latency_stats(samples: list) -> dict:
+    '''
+    `{ "n", "mean", "min", "max", "jitter" (max - min), "stdev" }` over a list of ns.
+    '''
+    n = len(samples)
+    if n == 0:
+        return { "n": 0 }
+    mean = sum(samples) / n
+    variance = sum((x - mean) ** 2 for x in samples) / (n - 1) if n > 1 else 0.0
+    return { "n": n, "mean": mean, "min": min(samples), "max": max(samples),
+             "jitter": max(samples) - min(samples), "stdev": variance ** 0.5 }
+
+def bench_trigger(waveform: list = None, runs: int = 20, reset_delay: int = 349818,
+                  window: QuietWindow = None) -> dict:
+    '''
+    End-to-end trigger timing on the bench: runs the RGH1.2 resetter and the Python monitor
+    against a replayed waveform, and has a PulseVerifier measure when /CPU_RESET actually got
+    pulsed after the 0xDA edge, every run. /CPU_RESET gets its pull-up for the duration
+    (see start_bench()), so leave it unconnected.
+
+    Parameters:
+    - waveform: Optional waveform from postwave.py. It has to get to 0xDA and stay there for
+                longer than reset_delay. Default is None (postwave.glitch2_waveform()).
+    - runs: Number of boots to measure. Default is 20.
+    - reset_delay: Resetter delay in 48 MHz cycles. Default is 349818, same as rgh12().
+    - window: Optional QuietWindow to run every attempt in, to compare with and without.
+
+    Returns `_latency_stats()` of the pulse start after 0xDA in ns, plus "expected" (what
+    reset_delay works out to), "width" (stats of the pulse width) and "results"
+    (`{ GlitchResult value: count }`).
+    '''
+    sm_freq = 48000000
+    freq(SYSTEM_CLOCK)
+
+    prg = _pio_program(_build_pio_glitch2_resetter_code, 4)
+    verifier = PulseVerifier(sm_id = 1, measure_pll = False)
+    start_bench(waveform)
+
+    starts  = []
+    widths  = []
+    results = {}
+    try:
+        for run in range(runs):
+            sm = rp2.StateMachine(0,
+                                  prg,
+                                  freq = sm_freq,
+                                  in_base=DBG_CPU_POST_OUT7,
+                                  set_base=CPU_RESET
+                                  )
+            sm.active(0)
+            sm.restart()
+            sm.put(reset_delay)
+
+            result = _do_glitch2_workflow(sm, window=window, verifier=verifier)
+            results[result.value] = results.get(result.value, 0) + 1
+
+            _, start_ns, width_ns = verifier.last
+            if start_ns >= 0:
+                starts.append(start_ns)
+            if width_ns >= 0:
+                widths.append(width_ns)
+    finally:
+        stop_bench()
+        CPU_RESET.init(Pin.IN)
+
+    stats = _latency_stats(starts)
+    stats["expected"] = reset_delay * 1000000000 // sm_freq
+    stats["width"]    = _latency_stats(widths)
+    stats["results"]  = results
+
+    print(f"bench: {stats['n']}/{runs} pulses seen, results {results}")
+    if stats["n"] != 0:
+        print(f"bench: pulse {stats['mean']:.1f} ns after 0xDA (programmed {stats['expected']} ns, "
+              f"off by {stats['mean'] - stats['expected']:.1f} ns)")
+        print(f"bench: jitter {stats['jitter']} ns peak to peak, stdev {stats['stdev']:.1f} ns, "
+              f"range {stats['min']}..{stats['max']} ns")
+    return stats
+
+_IMPORT_DONE_TICKS = ticks_us()
@@ -0,0 +1,119 @@
+'''
+pioplan.py
+Packs PIO programs into the two PIO blocks so they can all stay loaded at once.
+
+Every workflow used to rebuild statemachine 0 for its one program, which means nothing else
+can run alongside it. Each PIO block has 32 instruction slots and 4 statemachines, so there's
+room for capture, trigger and reset programs to all be loaded at the same time, as long as:
+- programs that talk to each other through IRQs are in the same block (IRQ flags are per block)
+- identical programs are only loaded once per block; statemachines can share them
+
+The planner does first-fit decreasing bin packing of program groups into blocks, and hands
+out load order, offsets and statemachine numbers. Programs get loaded into an empty block in
+plan order, and the loader puts them top down like the SDK does, so the offsets are what the
+plan says they'll be.
+
+Sharing tails between different programs (e.g. the PLL hold loop every standalone resetter
+has) isn't possible this way: the loader relocates jumps relative to each program's own offset,
+so one program can't jump into another. Identical programs do get shared.
+
+No hardware imports in here, so it can be tested on a PC.
+'''
+
+PIO_BLOCKS            = 2
+PIO_INSTRUCTION_SLOTS = 32
+PIO_STATEMACHINES     = 4
+
+class PioJob:
+    '''
+    A statemachine that needs a program loaded.
+    '''
+    __slots__ = ('name', 'program_key', 'length', 'group')
+
+    def __init__(self, name: str, program_key: str, length: int, group: str = None):
+        '''
+        Parameters:
+        - name: Name to refer to the statemachine by.
+        - program_key: Jobs with the same key run the same program and share one copy of it.
+        - length: Program length in instructions.
+        - group: Jobs with the same group end up in the same block. Default is None (own group).
+        '''
+        self.name        = name
+        self.program_key = program_key
+        self.length      = length
+        self.group       = group if group is not None else name
+
+class PioPlacement:
+    '''
+    Where a job ended up. sm_id is what to pass to rp2.StateMachine().
+    '''
+    __slots__ = ('job', 'block', 'sm_id', 'offset')
+
+    def __init__(self, job, block, sm_id, offset):
+        self.job    = job
+        self.block  = block
+        self.sm_id  = sm_id
+        self.offset = offset
+
+    def __repr__(self):
+        return f"{self.job.name}: PIO{self.block} SM{self.sm_id} offset {self.offset}"
+
+def _group_cost(jobs: list, loaded: dict = None) -> tuple:
+    '''
+    `(instruction slots, statemachines)` a group of jobs needs,
+    not counting programs that are already in `loaded`.
+    '''
+    programs = {}
+    for job in jobs:
+        if loaded is None or job.program_key not in loaded:
+            programs[job.program_key] = job.length
+    return (sum(programs.values()), len(jobs))
+
+def plan_pio(jobs: list, blocks: int = PIO_BLOCKS) -> list:
+    '''
+    Works out which block, statemachine and offset every job gets.
+
+    Parameters:
+    - jobs: PioJob list.
+    - blocks: Number of PIO blocks to use. Default is 2.
+
+    Returns PioPlacement list, in load order. Raises RuntimeError if it doesn't fit.
+    '''
+    groups = {}
+    for job in jobs:
+        groups.setdefault(job.group, []).append(job)
+
+    used_slots = [ 0 ] * blocks
+    used_sms   = [ 0 ] * blocks
+    loaded     = [ {} for _ in range(blocks) ]  # program key -> offset
+
+    # biggest groups first
+    order = sorted(groups.values(), key=lambda g: _group_cost(g), reverse=True)
+
+    placements = []
+    for group in order:
+        block = -1
+        for b in range(blocks):
+            slots, sms = _group_cost(group, loaded[b])
+            if used_slots[b] + slots <= PIO_INSTRUCTION_SLOTS and used_sms[b] + sms <= PIO_STATEMACHINES:
+                block = b
+                break
+        if block < 0:
+            slots, sms = _group_cost(group)
+            names = ", ".join(job.name for job in group)
+            raise RuntimeError(f"can't fit {names} ({slots} instructions, {sms} statemachines) in any PIO block")
+
+        for job in group:
+            if job.program_key not in loaded[block]:
+                # programs go in top down
+                used_slots[block] += job.length
+                loaded[block][job.program_key] = PIO_INSTRUCTION_SLOTS - used_slots[block]
+            placements.append(PioPlacement(job, block, block * PIO_STATEMACHINES + used_sms[block],
+                                           loaded[block][job.program_key]))
+            used_sms[block] += 1
+
+    return placements
+
+def report_plan(placements: list):
+    for placement in placements:
+        print(f"- {placement}")
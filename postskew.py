@@ -0,0 +1,75 @@
+'''
+postskew.py
+Works out per-bit POST wiring skew from a capture of POST code changes.
+
+The CPU changes all its POST bits at once, but by the time they get through the diodes
+(1N4148, 1N400x, whatever you had lying around) and into the GPIOs some bits are late,
+so the Pico sees intermediate codes between the real ones. e.g. 0xD7 -> 0xD8 can show up
+as 0xD7 -> 0xDF -> 0xD8 if bit 3 rises faster than bits 0-2 fall.
+
+The capture is a list of `(post_code, samples_held)` tuples. Codes held for at least
+`stable_samples` samples are real; anything shorter between two real codes is an
+intermediate. For every bit that changes between two real codes, the skew is how long
+it took to settle on its new level, counting from the first intermediate.
+
+No hardware imports in here, so it can be tested on a PC.
+'''
+
+SKEW_RISE = 0
+SKEW_FALL = 1
+
+def analyze_skew(events: list, stable_samples: int = 64) -> list:
+    '''
+    Finds the worst-case settle time of every POST bit.
+
+    Parameters:
+    - events: `(post_code, samples_held)` tuples, in the order they were captured.
+    - stable_samples: Codes held at least this long count as real POST codes. Default is 64.
+
+    Returns a list of 8 `[rise, fall]` lists, indexed by POST bit,
+    giving the worst skew seen in samples (0 if the bit never lagged).
+    '''
+    skew = [ [0, 0] for _ in range(8) ]
+
+    last_stable = -1
+    pending = []
+    for code, held in events:
+        if held < stable_samples:
+            pending.append((code, held))
+            continue
+
+        if last_stable >= 0 and code != last_stable and len(pending) != 0:
+            _record_transition(skew, last_stable, code, pending)
+
+        last_stable = code
+        pending = []
+
+    return skew
+
+def _record_transition(skew: list, before: int, after: int, intermediates: list):
+    '''
+    Updates `skew` with how long each changing bit took to settle going from `before` to `after`.
+    '''
+    changed = before ^ after
+    for bit in range(8):
+        mask = 1 << bit
+        if (changed & mask) == 0:
+            continue
+
+        # the bit has settled once it's at its final level in every later intermediate
+        settled_at = 0
+        elapsed = 0
+        for code, held in intermediates:
+            if (code & mask) != (after & mask):
+                settled_at = elapsed + held
+            elapsed += held
+
+        direction = SKEW_RISE if (after & mask) != 0 else SKEW_FALL
+        if settled_at > skew[bit][direction]:
+            skew[bit][direction] = settled_at
+
+def worst_skew(skew: list) -> int:
+    '''
+    Longest any bit took to settle, in whatever unit the skew table is in.
+    '''
+    return max(max(rise, fall) for rise, fall in skew)
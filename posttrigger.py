@@ -0,0 +1,111 @@
+'''
+posttrigger.py
+Compiles a POST code sequence and a wiring map into a PIO wait chain.
+
+Every resetter hand-codes its waits: the 8-wire ones do `wait(1, pin, 0)`/`wait(0, pin, 0)`
+for 0xD7..0xDA, and the 4-wire scripts get to 0xD6 with Python loops watching POST bit 1.
+This works it out for any subset of POST bits instead, so the whole pre-glitch wait can
+run in PIO no matter how many wires you've got.
+
+A `wait` on a level finishes at the first POST code (from wherever we are now) where that
+bit has that level. The compiler does a breadth-first search over positions in the sequence
+for the shortest chain of waits that lands exactly on the last code. If no chain can land
+there, the wiring can't tell the last code apart from the one before it and it's rejected.
+
+No hardware imports in here, so it can be tested on a PC.
+'''
+
+GLITCH2_POST_SEQUENCE = (0x00, 0x10, 0x11, 0x12, 0x13, 0x14, 0x15, 0x16, 0x17,
+                         0x18, 0x19, 0x1A, 0x1B, 0x1C, 0x1D, 0x1E,
+                         0xD0, 0xD1, 0xD2, 0xD3, 0xD4, 0xD5, 0xD6, 0xD7, 0xD8, 0xD9, 0xDA)
+'''
+POST codes from /CPU_RESET release through to the CB_B signature check (0xDA).
+'''
+
+CABOOM_POST_SEQUENCE = (0x00, 0x10, 0x11, 0x12, 0x13, 0x14, 0x15, 0x16, 0x17,
+                        0x18, 0x19, 0x1A, 0x1B, 0x1C, 0x1D)
+'''
+POST codes from /CPU_RESET release through to the bootrom RSA signature check (0x1D).
+'''
+
+def post_subsequence(sequence: tuple, start_code: int, end_code: int) -> tuple:
+    '''
+    Cuts `sequence` down to start_code..end_code (inclusive).
+    '''
+    start = sequence.index(start_code)
+    end = sequence.index(end_code, start)
+    return sequence[start:end + 1]
+
+def _next_position(sequence: tuple, position: int, bit: int, level: int) -> int:
+    '''
+    Where `wait(level)` on POST bit `bit` finishes if we're at `position`. -1 if never.
+    '''
+    for i in range(position, len(sequence)):
+        if ((sequence[i] >> bit) & 1) == level:
+            return i
+    return -1
+
+def compile_post_trigger(sequence: tuple, wiring: dict, in_base: int, max_waits: int = -1) -> list:
+    '''
+    Compiles the shortest wait chain that follows `sequence` from its first POST code
+    and finishes exactly when the last one appears.
+
+    Parameters:
+    - sequence: POST codes in the order the CPU outputs them. The statemachine must
+                start running while the first one is up.
+    - wiring: Maps POST bit number -> GPIO number, for every POST bit that's wired.
+    - in_base: GPIO number the statemachine's in_base will be set to.
+    - max_waits: Longest chain that'll fit in the program it's going into.
+                 Default is -1 (no limit).
+
+    Returns a list of `(level, pin_index)` tuples, one per `wait(level, pin, pin_index)`.
+    Raises RuntimeError if the wiring can't pin down the last code, or the chain is too long.
+    '''
+    if len(sequence) < 2:
+        raise RuntimeError("POST sequence needs at least two codes")
+
+    for bit, gpio in wiring.items():
+        if not (0 <= bit <= 7):
+            raise RuntimeError(f"POST bit {bit} doesn't exist")
+        if not (0 <= gpio - in_base <= 31):
+            raise RuntimeError(f"GPIO {gpio} (POST bit {bit}) out of reach of in_base {in_base}")
+
+    target = len(sequence) - 1
+    bits = sorted(wiring.keys())
+
+    # breadth-first search over positions in the sequence
+    came_from = { 0: None }
+    frontier = [ 0 ]
+    while len(frontier) != 0 and target not in came_from:
+        next_frontier = []
+        for position in frontier:
+            for bit in bits:
+                for level in (0, 1):
+                    landing = _next_position(sequence, position, bit, level)
+                    if landing <= position or landing in came_from:
+                        continue
+                    came_from[landing] = (position, level, bit)
+                    next_frontier.append(landing)
+        frontier = next_frontier
+
+    if target not in came_from:
+        wired = ", ".join(str(b) for b in bits)
+        raise RuntimeError(f"ambiguous wiring: POST bits {wired} can't tell " \
+                           f"0x{sequence[target]:02x} apart from 0x{sequence[target - 1]:02x}")
+
+    chain = []
+    position = target
+    while came_from[position] is not None:
+        position, level, bit = came_from[position]
+        chain.append((level, wiring[bit] - in_base))
+    chain.reverse()
+
+    if max_waits >= 0 and len(chain) > max_waits:
+        raise RuntimeError(f"wait chain to 0x{sequence[target]:02x} needs {len(chain)} waits, only room for {max_waits}")
+    return chain
+
+def describe_chain(chain: list, in_base: int) -> str:
+    '''
+    Pretty-prints a wait chain, for debugging.
+    '''
+    return "; ".join(f"wait {level} gpio {in_base + index}" for level, index in chain)
@@ -0,0 +1,128 @@
+'''
+postwave.py
+POST/CPU_RESET waveforms for bench mode, where the Pico plays a boot into its own inputs.
+
+A waveform is a list of `(post_code, reset_high, hold_usec)` segments: the POST code and
+the /CPU_RESET level to put out, and how long to hold them for. They can be synthetic
+(glitch2_waveform(), cbx_stall_waveform()), rebuilt from the stage timings TraceRecorder
+wrote down (waveform_from_trace()), or loaded from a JSON file.
+
+encode_waveform() packs one into the words the PIO waveform player in pigli360 eats.
+
+No hardware imports in here, so it can be tested on a PC.
+'''
+
+import json
+from array import array
+from posttrigger import GLITCH2_POST_SEQUENCE
+
+WAVEFORM_PIN_BITS       = 9     # POST bits 0-7, then /CPU_RESET
+WAVEFORM_COUNT_BITS     = 32 - WAVEFORM_PIN_BITS
+WAVEFORM_COUNT_MAX      = (1 << WAVEFORM_COUNT_BITS) - 1
+WAVEFORM_OVERHEAD_CYCLES = 3    # out pins, out y, and the last trip round the hold loop
+
+# how long /CPU_RESET is held low before every boot
+WAVEFORM_RESET_USEC = 2000
+
+# stage times that matter for the glitch, everything else gets stage_usec.
+# 0xDA is how long the hash check takes until it goes to 0xF2 (see rgh12())
+GLITCH2_STAGE_USEC = {
+    0xD9: 2500,
+    0xDA: 7290,
+}
+
+def glitch2_waveform(outcome: int = 0xDB, stage_usec: int = 500, stage_overrides: dict = None,
+                     end_usec: int = 10000) -> list:
+    '''
+    Synthetic Glitch2 boot: /CPU_RESET release, the whole GLITCH2_POST_SEQUENCE, then
+    either the glitch working or the hash check failing.
+
+    Parameters:
+    - outcome: 0xDB for 0xDA -> 0xDB -> 0x10 (XeLL), 0xF2 for 0xDA -> 0xF2. Default is 0xDB.
+    - stage_usec: How long every POST code is held unless it's in GLITCH2_STAGE_USEC
+                  or stage_overrides. Default is 500.
+    - stage_overrides: Optional `{ post_code: usec }` on top of GLITCH2_STAGE_USEC.
+    - end_usec: How long the last code is held before the waveform ends. Default is 10 ms.
+    '''
+    stage_times = dict(GLITCH2_STAGE_USEC)
+    if stage_overrides is not None:
+        stage_times.update(stage_overrides)
+
+    waveform = [ (0x00, 0, WAVEFORM_RESET_USEC) ]
+    for code in GLITCH2_POST_SEQUENCE:
+        waveform.append((code, 1, stage_times.get(code, stage_usec)))
+
+    if outcome == 0xDB:
+        waveform.append((0xDB, 1, stage_times.get(0xDB, stage_usec)))
+        waveform.append((0x10, 1, end_usec))
+    elif outcome == 0xF2:
+        waveform.append((0xF2, 1, end_usec))
+    else:
+        raise RuntimeError(f"no waveform for outcome {outcome:02x}")
+    return waveform
+
+def cbx_stall_waveform(stall_usec: int = 100000, stage_usec: int = 500) -> list:
+    '''
+    Synthetic failed RGH1.3 attempt: gets past 0xDA, then CB_X sits on 0x54 until
+    the SMC gives up and resets the CPU.
+
+    Parameters:
+    - stall_usec: How long 0x54 is held. Default is 100 ms (POST_TIMEOUT_TABLE gives it 80).
+    - stage_usec: Same as glitch2_waveform().
+    '''
+    waveform = glitch2_waveform(0xDB, stage_usec)[:-1]
+    waveform.append((0x54, 1, stall_usec))
+    waveform.append((0x00, 0, WAVEFORM_RESET_USEC))
+    return waveform
+
+def waveform_from_trace(trace: dict, stage_usec: int = 500) -> list:
+    '''
+    Rebuilds a boot from one line TraceRecorder wrote. The recorded stages (0xD6 onwards)
+    get their recorded times, and the outcome follows trace["ok"].
+    '''
+    overrides = {}
+    for feature, usec in trace.items():
+        if len(feature) == 2:
+            try:
+                overrides[int(feature, 16)] = usec
+            except ValueError:
+                pass
+    return glitch2_waveform(0xDB if trace.get("ok") else 0xF2, stage_usec, overrides)
+
+def waveform_usec(waveform: list) -> int:
+    return sum(segment[2] for segment in waveform)
+
+def encode_waveform(waveform: list, sm_freq: int) -> array:
+    '''
+    Packs a waveform into player words: pin levels in the low WAVEFORM_PIN_BITS bits,
+    hold cycles minus WAVEFORM_OVERHEAD_CYCLES in the rest. Segments too long for one word
+    are split up.
+
+    Parameters:
+    - waveform: `(post_code, reset_high, hold_usec)` list.
+    - sm_freq: Player statemachine frequency.
+    '''
+    words = array("I")
+    for post_code, reset_high, hold_usec in waveform:
+        pins = (post_code & 0xFF) | ((1 if reset_high else 0) << 8)
+        cycles = max(hold_usec * sm_freq // 1000000, WAVEFORM_OVERHEAD_CYCLES)
+        while cycles > 0:
+            chunk = min(cycles, WAVEFORM_COUNT_MAX + WAVEFORM_OVERHEAD_CYCLES)
+            # don't leave a tail too short to play
+            if 0 < cycles - chunk < WAVEFORM_OVERHEAD_CYCLES:
+                chunk -= WAVEFORM_OVERHEAD_CYCLES
+            words.append(pins | ((chunk - WAVEFORM_OVERHEAD_CYCLES) << WAVEFORM_PIN_BITS))
+            cycles -= chunk
+    return words
+
+def save_waveform(waveform: list, path: str):
+    with open(path, "w") as f:
+        json.dump([ list(segment) for segment in waveform ], f)
+
+def load_waveform(path: str) -> list:
+    '''
+    Loads a waveform saved by save_waveform(), or written by hand as
+    `[ [ post_code, reset_high, hold_usec ], ... ]`.
+    '''
+    with open(path) as f:
+        return [ tuple(segment) for segment in json.load(f) ]
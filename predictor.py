@@ -0,0 +1,143 @@
+'''
+predictor.py
+Calls failed glitch attempts early from how long the POST stages took.
+
+A failed attempt normally isn't recognized until 0xF2/0xFB, a post-glitch stall or an SMC
+timeout, which is a lot of wasted time per attempt. But the stage timings up to that point
+(how long 0xD6, 0xD9 etc. were held) already say a lot about whether it's going anywhere,
+e.g. a slowdown that didn't take makes 0xD9 too short, and a slowdown that took too hard
+makes it way too long.
+
+Training happens offline: record traces on the device with TraceRecorder, copy the file
+over, run train() on them and export_table() the result. The exported table only lists
+the timing bins that practically never led to a successful boot, so it's small enough
+to sit in the board profile. FailurePredictor checks stage timings against it as they come in.
+
+No hardware imports in here, so it can be trained/tested on a PC.
+'''
+
+import json
+from glitchsearch import wilson_interval
+
+def stage_feature(post_code: int) -> str:
+    '''
+    Feature name for the time POST code `post_code` was held, e.g. "d9".
+    '''
+    return f"{post_code:02x}"
+
+class TraceRecorder:
+    '''
+    Appends one line of JSON per attempt: stage timings in usec, plus whether it worked.
+    '''
+
+    def __init__(self, path: str = "traces.jsonl"):
+        self.path = path
+        self.stages = {}
+
+    def observe(self, post_code: int, held_usec: int):
+        self.stages[stage_feature(post_code)] = held_usec
+
+    def finish(self, success: bool):
+        self.stages["ok"] = success
+        with open(self.path, "a") as f:
+            f.write(json.dumps(self.stages))
+            f.write("\n")
+        self.stages = {}
+
+def load_traces(path: str) -> list:
+    '''
+    Loads traces written by TraceRecorder.
+    '''
+    traces = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if len(line) != 0:
+                traces.append(json.loads(line))
+    return traces
+
+def train(traces: list, bin_usec: dict, min_samples: int = 20, max_success_rate: float = 0.05) -> dict:
+    '''
+    Builds a decision table from recorded traces.
+
+    Every feature's timings are cut into bins, and a bin is marked as doomed if it's got
+    at least `min_samples` attempts and the upper Wilson bound on its success rate is
+    below `max_success_rate`.
+
+    Parameters:
+    - traces: Dicts from load_traces().
+    - bin_usec: Maps feature name -> bin width in usec, e.g. `{ "d9": 50, "d6": 100 }`.
+                Only these features are used.
+    - min_samples: Bins with fewer attempts than this are never marked doomed. Default is 20.
+    - max_success_rate: Success rate a bin has to be (confidently) under. Default is 5%.
+
+    Returns `{ feature: [ bin_usec, [ doomed bin indices ] ] }`.
+    '''
+    counts = { feature: {} for feature in bin_usec }
+    for trace in traces:
+        ok = trace["ok"]
+        for feature, width in bin_usec.items():
+            if feature not in trace:
+                continue
+            entry = counts[feature].setdefault(trace[feature] // width, [0, 0])
+            entry[1] += 1
+            if ok:
+                entry[0] += 1
+
+    table = {}
+    for feature, bins in counts.items():
+        doomed = sorted(b for b, (hits, attempts) in bins.items()
+                        if attempts >= min_samples and wilson_interval(hits, attempts)[1] < max_success_rate)
+        if len(doomed) != 0:
+            table[feature] = [ bin_usec[feature], doomed ]
+    return table
+
+def evaluate(table: dict, traces: list) -> tuple:
+    '''
+    Runs the table over traces. Returns `(failures caught, failures, successes wrongly called doomed)`.
+    '''
+    predictor = FailurePredictor(table)
+    caught = 0
+    failures = 0
+    false_alarms = 0
+    for trace in traces:
+        doomed = any(predictor.is_doomed(feature, usec) for feature, usec in trace.items() if feature != "ok")
+        if trace["ok"]:
+            if doomed:
+                false_alarms += 1
+        else:
+            failures += 1
+            if doomed:
+                caught += 1
+    return (caught, failures, false_alarms)
+
+def export_table(table: dict, path: str):
+    '''
+    Writes the table out as JSON. Put it in the board profile under "failure_table"
+    and pigli360.load_failure_predictor() will pick it up.
+    '''
+    with open(path, "w") as f:
+        json.dump(table, f)
+
+class FailurePredictor:
+    '''
+    Runtime side. Feed it stage timings with `observe()`; it returns True as soon as
+    one of them lands in a doomed bin.
+    '''
+
+    def __init__(self, table: dict):
+        # sets for fast lookups
+        self.table = { feature: (entry[0], set(entry[1])) for feature, entry in table.items() }
+        self.predicted = 0
+
+    def is_doomed(self, feature: str, usec: int) -> bool:
+        entry = self.table.get(feature)
+        if entry is None:
+            return False
+        return (usec // entry[0]) in entry[1]
+
+    def observe(self, post_code: int, held_usec: int) -> bool:
+        if self.is_doomed(stage_feature(post_code), held_usec):
+            self.predicted += 1
+            return True
+        return False
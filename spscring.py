@@ -0,0 +1,83 @@
+'''
+spscring.py
+Lock-free ring buffer for passing fixed-size records between the two RP2040 cores.
+
+One core only ever writes records and the head index, the other only ever reads records
+and writes the tail index. 32-bit stores are atomic on the M0+ and it doesn't reorder them,
+so publishing the head after the record is written is all the synchronization needed.
+No locks means the time-critical core never waits on the other one.
+
+Everything is preallocated, and records are three words so put() doesn't take *args
+(which would allocate a tuple every call). Keep the values under 2**30 so reading them
+back doesn't allocate a big int either.
+
+No hardware imports in here, so it can be tested on a PC.
+'''
+
+from array import array
+
+RING_RECORD_WORDS = 3
+
+class SpscRing:
+    '''
+    Single producer/single consumer ring of `(a, b, c)` records.
+    '''
+
+    def __init__(self, capacity: int):
+        '''
+        Parameters:
+        - capacity: Number of record slots. One is always left empty so full and empty
+                    can be told apart, so it holds capacity - 1 records at most.
+        '''
+        if capacity < 2:
+            raise RuntimeError("ring needs at least 2 slots")
+        self.capacity = capacity
+        self.buffer   = array("I", [ 0 ] * (capacity * RING_RECORD_WORDS))
+        self.indices  = array("I", [ 0, 0 ])   # head (producer writes it), tail (consumer writes it)
+        self.dropped  = 0                       # producer side only
+
+    def put(self, a: int, b: int = 0, c: int = 0) -> bool:
+        '''
+        Producer side. Returns False (and counts a drop) if the ring is full.
+        '''
+        head = self.indices[0]
+        next_head = head + 1
+        if next_head == self.capacity:
+            next_head = 0
+        if next_head == self.indices[1]:
+            self.dropped += 1
+            return False
+
+        i = head * RING_RECORD_WORDS
+        self.buffer[i]     = a
+        self.buffer[i + 1] = b
+        self.buffer[i + 2] = c
+        self.indices[0] = next_head   # publish only once the record's in
+        return True
+
+    def get(self, record: array) -> bool:
+        '''
+        Consumer side. Copies the oldest record into `record` (a preallocated
+        3-word array) and returns True, or returns False if the ring is empty.
+        '''
+        tail = self.indices[1]
+        if tail == self.indices[0]:
+            return False
+
+        i = tail * RING_RECORD_WORDS
+        record[0] = self.buffer[i]
+        record[1] = self.buffer[i + 1]
+        record[2] = self.buffer[i + 2]
+
+        tail += 1
+        if tail == self.capacity:
+            tail = 0
+        self.indices[1] = tail
+        return True
+
+    def __len__(self) -> int:
+        count = self.indices[0] - self.indices[1]
+        return count + self.capacity if count < 0 else count
+
+    def free(self) -> int:
+        return self.capacity - 1 - len(self)
@@ -0,0 +1,221 @@
+'''
+timing.py
+Plans reset/PLL delays from a time instead of a cycle count.
+
+The comments everywhere give the same delay in a pile of different units, e.g. the
+RGH1.2 V2 timing file 21 value is 7287.9375 usec, which is 349821 cycles @ 48 MHz, and the
+EXT_CLK value of 614.3125 usec works out to:
+- 29485-29498 @ 48 MHz
+- 58971-58998 @ 96 MHz
+- 117948-117999 @ 192 MHz
+- 122864 @ 200 MHz
+
+plan_delay() takes the delay in nanoseconds and works out the system clock, PIO clock
+divider (integer and fractional part) and loop count that get closest to it, then
+tells you exactly what delay you're going to get.
+
+Resolution is still bound to one statemachine cycle per attempt. DelayDither alternates
+between the two loop counts either side of the target so the average over a run of
+attempts lands on the target.
+
+No hardware imports in here, so it can be tested on a PC.
+'''
+
+SYSTEM_CLOCKS = (192000000, 180000000, 168000000, 156000000, 144000000, 132000000, 120000000, 96000000)
+'''
+System clocks the planner may pick from. All multiples of 12 MHz, otherwise nothing works.
+'''
+
+CLOCK_PROFILES = (
+    (192000000, 1100),
+    (216000000, 1100),
+    (240000000, 1100),
+    (252000000, 1150),
+    (264000000, 1150),
+    (288000000, 1200),
+)
+'''
+`(system clock, core millivolts)` profiles for finer timing than 192 MHz gets you.
+All multiples of 12 MHz. Anything past 133 MHz is out of spec, so these only get used once
+they've passed pigli360.validate_clock_profiles() on your particular Pico.
+Only 192, 240 and 288 MHz can run a 48 MHz statemachine off an integer divider.
+'''
+
+RESETTER_OVERHEAD_CYCLES = 1
+'''
+Cycles between the POST edge the resetter waits on and /CPU_RESET going low, on top of
+the loop count. `jmp y--` runs y + 1 times.
+'''
+
+class DelayPlan:
+    '''
+    A planned delay. Put `cycles` in the FIFO and run the statemachine with divider
+    `div_int + div_frac / 256` off a `sys_freq` system clock.
+    '''
+    __slots__ = ('target_ns', 'sys_freq', 'div_int', 'div_frac', 'cycles', 'overhead_cycles')
+
+    def __init__(self, target_ns, sys_freq, div_int, div_frac, cycles, overhead_cycles):
+        self.target_ns       = target_ns
+        self.sys_freq        = sys_freq
+        self.div_int         = div_int
+        self.div_frac        = div_frac
+        self.cycles          = cycles
+        self.overhead_cycles = overhead_cycles
+
+    def sm_freq(self) -> float:
+        '''
+        Average statemachine clock in Hz.
+        '''
+        return self.sys_freq * 256 / (self.div_int * 256 + self.div_frac)
+
+    def cycles_to_ns(self, cycles: int) -> float:
+        '''
+        Converts a loop count to the delay it produces, in nanoseconds.
+        '''
+        return (cycles + self.overhead_cycles) * (self.div_int * 256 + self.div_frac) * 1e9 \
+                / (self.sys_freq * 256)
+
+    def achieved_ns(self) -> float:
+        '''
+        Delay this plan actually produces. With a fractional divider this is the average;
+        see jitter_ns().
+        '''
+        return self.cycles_to_ns(self.cycles)
+
+    def error_ns(self) -> float:
+        return self.achieved_ns() - self.target_ns
+
+    def jitter_ns(self) -> float:
+        '''
+        Peak-to-peak jitter of the delay. A fractional divider stretches some statemachine
+        cycles by one system clock, so the delay wanders by one system clock depending on
+        where in the divider's pattern the POST edge lands. Integer dividers don't jitter.
+        '''
+        return 0.0 if self.div_frac == 0 else 1e9 / self.sys_freq
+
+    def __repr__(self):
+        return f"{self.cycles} cycles @ {self.sys_freq // 1000000} MHz / {self.div_int}+{self.div_frac}/256 " \
+               f"= {self.achieved_ns():.3f} ns (error {self.error_ns():+.3f} ns, jitter {self.jitter_ns():.3f} ns)"
+
+def plan_delay(delay_ns: float,
+               sys_freqs: tuple = SYSTEM_CLOCKS,
+               max_div: int = 4,
+               allow_fractional: bool = True,
+               overhead_cycles: int = RESETTER_OVERHEAD_CYCLES,
+               sm_freq_range: tuple = None) -> DelayPlan:
+    '''
+    Works out the system clock, divider and loop count that get closest to delay_ns.
+
+    Parameters:
+    - delay_ns: Wanted delay in nanoseconds. 7287.9375 usec is 7287937.5.
+    - sys_freqs: System clocks to choose from. Default is SYSTEM_CLOCKS.
+                 Pass a single clock if you can't change it.
+    - max_div: Largest divider to consider. Bigger dividers mean slower statemachines,
+               which makes the pulse width and POST sampling coarser. Default is 4.
+    - allow_fractional: If True, fractional dividers may be used. They get closer
+                        to the target on average but add jitter. Default is True.
+    - overhead_cycles: Fixed statemachine cycles on top of the loop count.
+                       Default is RESETTER_OVERHEAD_CYCLES.
+    - sm_freq_range: Optional `(lowest, highest)` statemachine clock in Hz. Use it when the
+                     program has other timings in cycles that mustn't move much, e.g. the
+                     reset pulse width. Default is None (anything max_div allows).
+
+    Ties go to integer dividers, then faster system clocks, then smaller dividers.
+    '''
+    if delay_ns <= 0:
+        raise RuntimeError("delay must be positive")
+
+    best = None
+    best_key = None
+    step = 1 if allow_fractional else 256
+    for sys_freq in sys_freqs:
+        # target length in 1/256ths of a system clock
+        target = delay_ns * sys_freq * 256 / 1e9
+        for div in range(256, max_div * 256 + 1, step):
+            if sm_freq_range is not None and \
+               not (sm_freq_range[0] * div <= sys_freq * 256 <= sm_freq_range[1] * div):
+                continue
+            total_cycles = int(target / div + 0.5)
+            cycles = total_cycles - overhead_cycles
+            if cycles < 0:
+                continue
+            error = abs(total_cycles * div - target)
+            key = (int(error * 1e9 / (sys_freq * 256) * 1000 + 0.5), div & 0xFF != 0, -sys_freq, div)
+            if best_key is None or key < best_key:
+                best_key = key
+                best = DelayPlan(delay_ns, sys_freq, div >> 8, div & 0xFF, cycles, overhead_cycles)
+
+    if best is None:
+        raise RuntimeError(f"no plan can do {delay_ns} ns")
+    return best
+
+def plan_for_clock(delay_ns: float, sys_freq: int, div_int: int = 1, div_frac: int = 0,
+                   overhead_cycles: int = RESETTER_OVERHEAD_CYCLES) -> DelayPlan:
+    '''
+    Plans a delay with the clock and divider already decided, i.e. just works out the loop count.
+    '''
+    div = div_int * 256 + div_frac
+    total_cycles = int(delay_ns * sys_freq * 256 / 1e9 / div + 0.5)
+    return DelayPlan(delay_ns, sys_freq, div_int, div_frac, max(0, total_cycles - overhead_cycles), overhead_cycles)
+
+def convert_cycles(cycles: int, from_freq: int, to_freq: int,
+                   overhead_cycles: int = RESETTER_OVERHEAD_CYCLES) -> int:
+    '''
+    Converts a loop count at one statemachine clock to the one that gives the closest delay
+    at another, e.g. a 48 MHz reset delay to a 240 MHz statemachine.
+    '''
+    total = (cycles + overhead_cycles) * to_freq
+    return max(0, (total + (from_freq >> 1)) // from_freq - overhead_cycles)
+
+def convert_delay_table(table, from_freq: int, to_freq: int,
+                        overhead_cycles: int = RESETTER_OVERHEAD_CYCLES):
+    '''
+    convert_cycles() over a whole delay table. Takes a dict (values get converted)
+    or a list/tuple of loop counts, and returns the same kind of thing back.
+    '''
+    if isinstance(table, dict):
+        return { key: convert_cycles(cycles, from_freq, to_freq, overhead_cycles) for key, cycles in table.items() }
+    converted = [ convert_cycles(cycles, from_freq, to_freq, overhead_cycles) for cycles in table ]
+    return tuple(converted) if isinstance(table, tuple) else converted
+
+class DelayDither:
+    '''
+    Spreads a delay across attempts for better than one cycle resolution on average.
+
+    Each call to next_cycles() returns the loop count either just under or just over
+    the target, sigma-delta style, so the running average converges on the target
+    instead of wandering around like random dithering would.
+    '''
+
+    def __init__(self, plan: DelayPlan):
+        self.plan = plan
+
+        # exact target in statemachine cycles, minus overhead
+        exact = plan.target_ns * plan.sys_freq * 256 / (1e9 * (plan.div_int * 256 + plan.div_frac)) \
+                - plan.overhead_cycles
+        self.low_cycles = int(exact)
+        self.fraction   = exact - self.low_cycles
+        self._acc       = 0.0
+        self._count     = 0
+        self._sum_ns    = 0.0
+
+    def next_cycles(self) -> int:
+        '''
+        Loop count to use for the next attempt.
+        '''
+        self._acc += self.fraction
+        cycles = self.low_cycles
+        if self._acc >= 1.0:
+            self._acc -= 1.0
+            cycles += 1
+        self._count += 1
+        self._sum_ns += self.plan.cycles_to_ns(cycles)
+        return cycles
+
+    def average_ns(self) -> float:
+        '''
+        Average delay handed out so far.
+        '''
+        if self._count == 0:
+            return self.plan.achieved_ns()
+        return self._sum_ns / self._count